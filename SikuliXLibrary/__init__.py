@@ -9,6 +9,7 @@ from .sikulixlogger import SikuliXLogger
 from .sikulixregion import SikuliXRegion
 from .sikulixdebug import SikuliXDebug
 from .sikulixsettings import SikuliXSettings
+from .sikulixasync import SikuliXAsync
 
 
 from .version import __version__ as VERSION
@@ -1,14 +1,34 @@
 # MIT license
 
 from .sikulixjclass import *
+from .sikulixcapture import *
+import time
 
+if not useJpype:
+    from .sikulixpy4j import *
 
 class SikuliXApp(SikuliXJClass):
     '''
         SikuliX Application class (App) methods
     '''
+    # seconds between checks while waiting for an application to be ready
+    readyScanInterval = 0.1
+
+    @not_keyword
+    def __init__(self):
+        # App handles by name or title, created once and reused by App Open, App Focus and App Close
+        self.apps = {}
+
+    @not_keyword
+    def _app(self, name):
+        app = self.apps.get(name)
+        if app == None:
+            app = SikuliXJClass.App(name)
+            self.apps[name] = app
+        return app
+
     @keyword
-    def app_open(self, application):
+    def app_open(self, application, ready=None, timeout=30, idleTime=0.5):
         '''
         Open the specified application (e.g. notepad.exe). Check https://sikulix-2014.readthedocs.io/en/latest/appclass.html for more
         
@@ -21,12 +41,61 @@ class SikuliXApp(SikuliXJClass):
             - put the application string in apostrophes and the rest following the second apostrophes will be taken as parameter string
             - put `` -- `` (space 2 hyphens! space) between the applications name or path (no apostrophes!) and the parameter string.
 
+        By default the keyword returns right after starting the application. With ready, it returns as soon as
+        the application is usable, or fails after timeout seconds:
+            - window - the application has a window
+            - idle - the application window exists and its content did not change for idleTime seconds
+            - image:name - the image is visible on screen, e.g. image:main_toolbar.png=0.8
+        Returns the seconds from the start until the application was ready, also logged as launch latency.
+
         | App Open | C:/Windows/System32/notepad.exe |
         | App Open | "C:/Windows/System32/notepad.exe"path_to_my_txt_file |
         | App Open | C:/Windows/System32/notepad.exe -- path_to_my_txt_file |
+        | ${latency} | App Open | leafpad | ready=window | timeout=10 |
+        | App Open | leafpad | ready=image:leafpad_menu.png |
         '''
-        #SikuliXJClass.App.open(application)
-        SikuliXJClass.App(application).open()
+        if ready != None and ready not in ('window', 'idle') and not ready.startswith('image:'):
+            raise Exception('Unsupported ready condition: {}'.format(ready))
+        app = self._app(application)
+        start = time.time()
+        app.open()
+        if ready != None:
+            self._app_wait_ready(app, ready, start + float(timeout), float(idleTime))
+        latency = time.time() - start
+        logger.info('Launch latency of {}: {:.2f} seconds'.format(application, latency))
+        return latency
+
+    @not_keyword
+    def _app_wait_ready(self, app, ready, deadline, idleTime):
+        if ready.startswith('image:'):
+            # one wait operation of SikuliX, scanning with WaitScanRate
+            target = ready[len('image:'):]
+            img, _, sim = target.partition('=')
+            pattern = SikuliXJClass.Pattern(img)
+            if sim:
+                pattern.similar(float(sim))
+            if SikuliXJClass.Screen().exists(pattern, JDouble(max(0.0, deadline - time.time()))) == None:
+                raise Exception('Application not ready, image not visible: {}'.format(target))
+            return
+
+        last = None
+        stableSince = None
+        while True:
+            window = app.window() if app.hasWindow() else None
+            if window != None:
+                if ready == 'window':
+                    return
+                rect = (int(window.x), int(window.y), int(window.w), int(window.h))
+                sample = (rect, SikuliXFrame.capture(SikuliXJClass.Screen(), rect).thumbnail())
+                now = time.time()
+                if last == None or last[0] != rect or SikuliXFrame.difference(last[1], sample[1]) > 0.001:
+                    stableSince = now
+                last = sample
+                if now - stableSince >= idleTime:
+                    return
+            if time.time() >= deadline:
+                raise Exception('Application not ready within timeout, condition: {}'.format(ready))
+            time.sleep(SikuliXApp.readyScanInterval)
 
     @keyword
     def app_focus(self, title):
@@ -36,7 +105,11 @@ class SikuliXApp(SikuliXJClass):
         | App Focus | Notepad |
         '''
         #SikuliXJClass.App.focus(title)
-        SikuliXJClass.App(title).focus()
+        app = self._app(title)
+        if not app.focus():
+            # the cached handle may belong to an application closed meanwhile
+            self.apps.pop(title, None)
+            self._app(title).focus()
 
     @keyword
     def app_close(self, app):
@@ -46,4 +119,5 @@ class SikuliXApp(SikuliXJClass):
         | App Close | Notepad |
         '''
         #SikuliXJClass.App.close(app)
-        SikuliXJClass.App(app).close()
+        self._app(app).close()
+        self.apps.pop(app, None)
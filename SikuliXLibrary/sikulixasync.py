@@ -0,0 +1,68 @@
+# MIT license
+
+from .sikulixcapture import attach_background_thread
+from .sikulixcontext import *
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, contextvars, functools
+
+
+class SikuliXAsync():
+    '''
+        asyncio facade of SikuliXLibrary, for using the library directly from Python. The keyword methods run in
+        a thread pool, so that waiting for the GUI can overlap with other I/O of the event loop, and the calls can
+        be awaited, gathered and cancelled. Under JPype, the GIL is released while SikuliX works in Java.
+
+        Every asyncio task uses its own region state (active region, last match, ...), as described for
+        concurrency in SikuliXLibrary, also when its calls run in different pool threads.
+
+        | lib = SikuliXLibrary(sikuli_path, img_path)
+        | alib = SikuliXAsync(lib)
+        | await alib.region_wait('Leafpad', 10)
+        | save, cancel = await asyncio.gather(alib.region_exists('save'), alib.region_exists('cancel'))
+        | text = await asyncio.wait_for(alib.region_getText(), timeout=5)
+
+        A cancelled call returns at once, but the SikuliX operation already started finishes in background,
+        at the latest when its own timeout expires.
+    '''
+    # keyword methods with an awaitable counterpart; any other method can be run with call()
+    keywords = ('region_find', 'region_wait', 'region_waitVanish', 'region_exists', 'region_has',
+                'region_findText', 'region_waitText', 'region_waitVanishText', 'region_existsText', 'region_hasText',
+                'region_getText', 'region_text', 'region_indexText', 'region_findIndexedText',
+                'region_existsIndexedText', 'region_screenshot', 'region_click', 'region_doubleClick',
+                'region_rightClick', 'region_hover', 'region_paste', 'region_type', 'region_dragDrop',
+                'region_runActions', 'region_clickAndWaitChange', 'region_typeAndWaitChange',
+                'region_waitStable')
+
+    def __init__(self, library, maxWorkers=4):
+        self.library = library
+        self.executor = ThreadPoolExecutor(max_workers=int(maxWorkers), thread_name_prefix='SikuliXAsync',
+                                           initializer=attach_background_thread)
+
+    async def call(self, name, *args, **kwargs):
+        # run a library method in the pool, with the region state of the calling task
+        method = getattr(self.library, name)
+        ctx = self.library._context()
+        run = functools.partial(SikuliXContext.run, self.library, ctx, method, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, contextvars.copy_context().run, run)
+
+    def close(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
+
+
+def _async_keyword(name):
+    async def method(self, *args, **kwargs):
+        return await self.call(name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = 'Awaitable %s, run in the thread pool.' % name
+    return method
+
+for _name in SikuliXAsync.keywords:
+    setattr(SikuliXAsync, _name, _async_keyword(_name))
@@ -0,0 +1,356 @@
+# MIT license
+
+from .sikulixjclass import *
+import collections, os, queue, threading, time
+
+# optional, vectorized frame differencing: pip install robotframework-sikulixlibrary[numpy]
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if not useJpype:
+    from .sikulixpy4j import *
+
+
+def attach_background_thread():
+    # called first in background threads using Java, so that these do not keep the JVM alive
+    if useJpype:
+        JClass('java.lang.Thread').attachAsDaemon()
+
+
+class SikuliXFrame():
+    '''
+        In-memory capture of a screen area: the Java image together with the screen coordinates it was taken from
+    '''
+    def __init__(self, image, x, y, w, h, timestamp=None):
+        self.image = image
+        self.x = int(x)
+        self.y = int(y)
+        self.w = int(w)
+        self.h = int(h)
+        self.timestamp = time.time() if timestamp == None else timestamp
+        self._digest = None
+
+    @staticmethod
+    def capture(screen, region):
+        # region is a (x, y, w, h) tuple; the pixels stay in the JVM, no file is written
+        simg = screen.capture(JInt(region[0]), JInt(region[1]), JInt(region[2]), JInt(region[3]))
+        return SikuliXFrame(simg.getImage(), simg.x, simg.y, simg.w, simg.h)
+
+    @staticmethod
+    def last_searched(region):
+        # the screen image SikuliX captured for the latest search in region, if available
+        try:
+            simg = region.getScreen().getLastScreenImageFromScreen()
+        except Exception:
+            return None
+        if simg == None:
+            return None
+        # the screen object is shared by regions, the image may be of a search in another thread
+        if (int(simg.x), int(simg.y), int(simg.w), int(simg.h)) != (int(region.x), int(region.y), int(region.w), int(region.h)):
+            return None
+        return SikuliXFrame(simg.getImage(), simg.x, simg.y, simg.w, simg.h)
+
+    def rect(self):
+        return (self.x, self.y, self.w, self.h)
+
+    def digest(self, region=None):
+        # content hash of the full resolution pixels, used to detect if the screen changed; the pixels are read
+        # and hashed by Java, only the hash crosses the bridge. With a screen area (x, y, w, h), only this area
+        # is hashed, without copying it first; None if the area is not fully inside the frame
+        if region == None:
+            if self._digest is None:
+                self._digest = self._area_digest(0, 0, self.w, self.h)
+            return self._digest
+        x, y, w, h = (int(v) for v in region)
+        if x < self.x or y < self.y or x + w > self.x + self.w or y + h > self.y + self.h or w <= 0 or h <= 0:
+            return None
+        return self._area_digest(x - self.x, y - self.y, w, h)
+
+    def _area_digest(self, x, y, w, h):
+        # x, y are relative to the frame
+        rgb = self.image.getRGB(JInt(x), JInt(y), JInt(w), JInt(h), None, JInt(0), JInt(w))
+        buf = SikuliXJClass.ByteBuffer.allocate(JInt(w * h * 4))
+        buf.asIntBuffer().put(rgb)
+        sha = SikuliXJClass.MessageDigest.getInstance('SHA-1')
+        sha.update(('%dx%d:' % (w, h)).encode())
+        sha.update(buf)
+        return bytes(sha.digest()).hex()
+
+    def scaled(self, factor):
+        # downscaled copy of the frame, drawn by Java 2D with bilinear interpolation
+        if factor >= 1.0:
+            return self
+        w = max(1, int(self.w * factor))
+        h = max(1, int(self.h * factor))
+        img = SikuliXJClass.BufferedImage(JInt(w), JInt(h), SikuliXJClass.BufferedImage.TYPE_INT_RGB)
+        g = img.createGraphics()
+        g.setRenderingHint(SikuliXJClass.RenderingHints.KEY_INTERPOLATION, 
+                           SikuliXJClass.RenderingHints.VALUE_INTERPOLATION_BILINEAR)
+        g.drawImage(self.image, 0, 0, JInt(w), JInt(h), None)
+        g.dispose()
+        return SikuliXFrame(img, self.x, self.y, w, h, self.timestamp)
+
+    def crop(self, region):
+        # copy of the given screen area (x, y, w, h), or None if the area is not fully inside the frame
+        x, y, w, h = (int(v) for v in region)
+        if x < self.x or y < self.y or x + w > self.x + self.w or y + h > self.y + self.h or w <= 0 or h <= 0:
+            return None
+        img = SikuliXJClass.BufferedImage(JInt(w), JInt(h), SikuliXJClass.BufferedImage.TYPE_INT_RGB)
+        g = img.createGraphics()
+        g.drawImage(self.image.getSubimage(JInt(x - self.x), JInt(y - self.y), JInt(w), JInt(h)), 0, 0, None)
+        g.dispose()
+        return SikuliXFrame(img, x, y, w, h, self.timestamp)
+
+    def encode(self, fmt='png', quality=None):
+        # encoding is done by Java ImageIO into memory, only the encoded bytes cross the bridge
+        img = self.image
+        if fmt != 'png' and img.getType() != SikuliXJClass.BufferedImage.TYPE_INT_RGB:
+            # formats without alpha channel support
+            img = SikuliXJClass.BufferedImage(JInt(self.w), JInt(self.h), SikuliXJClass.BufferedImage.TYPE_INT_RGB)
+            g = img.createGraphics()
+            g.drawImage(self.image, 0, 0, None)
+            g.dispose()
+
+        out = SikuliXJClass.ByteArrayOutputStream()
+        if quality == None:
+            SikuliXJClass.ImageIO.write(img, fmt, out)
+            return bytes(out.toByteArray())
+
+        writer = SikuliXJClass.ImageIO.getImageWritersByFormatName(fmt).next()
+        param = writer.getDefaultWriteParam()
+        if param.canWriteCompressed():
+            param.setCompressionMode(SikuliXJClass.ImageWriteParam.MODE_EXPLICIT)
+            types = param.getCompressionTypes()
+            if types != None and len(types) > 0:
+                param.setCompressionType(types[0])
+            param.setCompressionQuality(JFloat(quality))
+        stream = SikuliXJClass.ImageIO.createImageOutputStream(out)
+        try:
+            writer.setOutput(stream)
+            writer.write(None, SikuliXJClass.IIOImage(img, None, None), param)
+        finally:
+            stream.close()
+            writer.dispose()
+        return bytes(out.toByteArray())
+
+    def gray(self, w, h):
+        # small grayscale copy of the frame, drawn by Java 2D with bilinear interpolation; one byte per pixel
+        img = SikuliXJClass.BufferedImage(JInt(w), JInt(h), SikuliXJClass.BufferedImage.TYPE_BYTE_GRAY)
+        g = img.createGraphics()
+        g.setRenderingHint(SikuliXJClass.RenderingHints.KEY_INTERPOLATION, 
+                           SikuliXJClass.RenderingHints.VALUE_INTERPOLATION_BILINEAR)
+        g.drawImage(self.image, 0, 0, JInt(w), JInt(h), None)
+        g.dispose()
+        return bytes(img.getRaster().getDataBuffer().getData())
+
+    def thumbnail(self, maxSize=160):
+        # small grayscale copy for comparing frames, with the aspect ratio of the frame
+        factor = min(1.0, float(maxSize) / max(self.w, self.h))
+        return self.gray(max(1, int(self.w * factor)), max(1, int(self.h * factor)))
+
+    @staticmethod
+    def difference(px1, px2, tolerance=16):
+        # fraction of pixels of two thumbnails differing by more than tolerance gray levels, noise is ignored
+        if len(px1) != len(px2) or len(px1) == 0:
+            return 1.0
+        if numpy != None:
+            diff = numpy.abs(numpy.frombuffer(px1, numpy.uint8).astype(numpy.int16) -
+                             numpy.frombuffer(px2, numpy.uint8).astype(numpy.int16))
+            return float(numpy.count_nonzero(diff > tolerance)) / len(px1)
+        changed = sum(1 for a, b in zip(px1, px2) if abs(a - b) > tolerance)
+        return changed / float(len(px1))
+
+    def dhash(self):
+        # 64 bit difference hash: similar looking frames have hashes with a small hamming distance
+        px = self.gray(9, 8)
+        bits = 0
+        for row in range(8):
+            for col in range(8):
+                bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+        return bits
+
+    @staticmethod
+    def strip(frames, columns=5):
+        # contact sheet of equally sized frames, in rows of the given number of columns
+        columns = max(1, min(columns, len(frames)))
+        rows = (len(frames) + columns - 1) // columns
+        w = max(f.w for f in frames)
+        h = max(f.h for f in frames)
+        img = SikuliXJClass.BufferedImage(JInt(columns * w), JInt(rows * h), SikuliXJClass.BufferedImage.TYPE_INT_RGB)
+        g = img.createGraphics()
+        for i, f in enumerate(frames):
+            g.drawImage(f.image, JInt((i % columns) * w), JInt((i // columns) * h), None)
+        g.dispose()
+        return SikuliXFrame(img, 0, 0, columns * w, rows * h, frames[-1].timestamp)
+
+    @staticmethod
+    def can_encode(fmt):
+        return bool(SikuliXJClass.ImageIO.getImageWritersByFormatName(fmt).hasNext())
+
+
+class SikuliXArtifactWriter():
+    '''
+        Background writer that encodes captured frames and saves them to disk. Frames are handed over through
+        a bounded queue, so that keywords return as soon as the pixels are captured. When the queue is full,
+        submit blocks until the writer catches up.
+    '''
+    def __init__(self, maxQueue=64):
+        self.queue = queue.Queue(maxsize=maxQueue)
+        self.errors = []
+        self.thread = None
+        self.lock = threading.Lock()
+        # small image written over released images, encoded by the writer thread when first needed
+        self.placeholder = None
+
+    def submit(self, frame, path, options=None, onWritten=None):
+        # options is a snapshot of the logger image options at the time of the capture; the optional
+        # callback(path, size) of the submitting logger is called after the image is saved
+        self._start()
+        self.queue.put((frame, path, options, onWritten))
+
+    def release(self, path):
+        # the image and its thumbnail are overwritten by a 1x1 placeholder, so that log entries referencing
+        # them stay valid; queued as well, so that an image is released only after it was written
+        self._start()
+        self.queue.put((None, path, None, None))
+
+    def _start(self):
+        with self.lock:
+            if self.thread == None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='SikuliXWriter', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        attach_background_thread()
+        while True:
+            item = self.queue.get()
+            try:
+                if item == None:
+                    return
+                if item[0] == None:
+                    self._release(item[1])
+                else:
+                    self._write(*item)
+            except Exception as e:
+                libLogger.error('Screenshot write failed: %s' % e)
+                self.errors.append('{}: {}'.format(item[1], e))
+            finally:
+                self.queue.task_done()
+
+    def _release(self, path):
+        if self.placeholder == None:
+            image = SikuliXJClass.BufferedImage(JInt(1), JInt(1), SikuliXJClass.BufferedImage.TYPE_INT_RGB)
+            self.placeholder = SikuliXFrame(image, 0, 0, 1, 1).encode('png')
+        for path in (path, SikuliXArtifactWriter.thumbnail_path(path)):
+            if os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(self.placeholder)
+
+    def _write(self, frame, path, options, onWritten):
+        if options == None:
+            data = frame.encode('png')
+        else:
+            frame = frame.scaled(SikuliXArtifactWriter.scale_factor(frame, options))
+            data = frame.encode(options['format'], options['quality'])
+        with open(path, 'wb') as f:
+            f.write(data)
+        size = len(data)
+
+        # small preview embedded in the log, linking to the full image
+        if options != None and options['thumbnailSize'] > 0:
+            thumb = frame.scaled(float(options['thumbnailSize']) / max(frame.w, frame.h))
+            data = thumb.encode(options['format'], options['quality'])
+            thumb_path = SikuliXArtifactWriter.thumbnail_path(path)
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            with open(thumb_path, 'wb') as f:
+                f.write(data)
+            size += len(data)
+
+        if onWritten != None:
+            onWritten(path, size)
+
+    @staticmethod
+    def thumbnail_path(path):
+        return os.path.join(os.path.dirname(path), 'thumbs', os.path.basename(path))
+
+    @staticmethod
+    def scale_factor(frame, options):
+        factor = float(options['scale'])
+        if options['maxSize'] > 0:
+            factor = min(factor, float(options['maxSize']) / max(frame.w, frame.h))
+        return factor
+
+    def flush(self):
+        # wait until all submitted frames are written; returns the errors since the last flush
+        self.queue.join()
+        errors, self.errors = self.errors, []
+        return errors
+
+    def stop(self):
+        if self.thread != None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.thread = None
+
+
+class SikuliXFrameBuffer():
+    '''
+        Background sampler keeping the last seconds of low resolution screen frames in a fixed size ring buffer
+        in memory. Nothing is written to disk, unless the history is dumped e.g. when a keyword fails.
+    '''
+    def __init__(self):
+        self.frames = collections.deque(maxlen=1)
+        # frames are appended by the sampler thread while keywords read or clear them
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopEvent = threading.Event()
+        self.rate = 2.0
+        self.maxSize = 480
+
+    def running(self):
+        return self.thread != None and self.thread.is_alive()
+
+    def start(self, seconds=5, rate=2, maxSize=480):
+        self.stop()
+        self.rate = float(rate)
+        self.maxSize = int(maxSize)
+        with self.lock:
+            self.frames = collections.deque(maxlen=max(1, int(float(seconds) * self.rate)))
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self._run, name='SikuliXFrameBuffer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.running():
+            self.stopEvent.set()
+            self.thread.join()
+        self.thread = None
+
+    def _run(self):
+        attach_background_thread()
+        # own Screen object, so that the last searched image of the library screen is not replaced
+        screen = SikuliXJClass.Screen()
+        br = screen.getBottomRight()
+        bounds = (0, 0, br.x, br.y)
+        factor = float(self.maxSize) / max(int(br.x), int(br.y))
+        period = 1.0 / self.rate
+        next_sample = time.time()
+        while not self.stopEvent.wait(max(0.0, next_sample - time.time())):
+            next_sample += period
+            try:
+                frame = SikuliXFrame.capture(screen, bounds).scaled(factor)
+                with self.lock:
+                    self.frames.append(frame)
+            except Exception as e:
+                libLogger.error('Frame buffer capture failed: %s' % e)
+
+    def history(self):
+        # snapshot of the buffered frames, oldest first
+        with self.lock:
+            return list(self.frames)
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
@@ -0,0 +1,102 @@
+# MIT license
+
+from .sikulixjclass import *
+import asyncio, contextvars, threading, weakref
+
+# contexts of the library instances, by instance id, as (context, owner) tuples: a context is valid only in the
+# thread or asyncio task owning it
+_sikulixContexts = contextvars.ContextVar('sikulixContexts', default=None)
+
+
+class SikuliXContext():
+    '''
+        Execution state of one thread or asyncio task: the active region (with its own auto wait and last match),
+        the user defined rectangle, the pattern and match of the latest operation and the OCR text index. 
+        The first use in a new thread or task creates its own context, copied from the
+        context of the parent task or from the main context of the library, so that keywords running concurrently
+        do not overwrite each other's state. Contexts copied before the main context was reset, see Reset State, 
+        are stale and replaced by a new copy at their next use.
+    '''
+    def __init__(self, region, userDefined, pattern=None, match=None, generation=0):
+        self.owner = SikuliXContext.current_owner()
+        # generation of the main context this context was copied from
+        self.generation = generation
+        self.region = region
+        self.userDefined = userDefined
+        self.pattern = SikuliXJClass.Pattern() if pattern == None else pattern
+        self.match = SikuliXJClass.Match() if match == None else match
+        self.textIndex = None
+        # frame searched by the last find, read by the logging hooks of the keyword, see SikuliXFrame.last_searched
+        self.searchedFrame = None
+        # name of the named region replacing the active region during a keyword, see Region Define
+        self.regionName = None
+        # of the main context: the contexts copied for other threads and tasks, as long as these are in use
+        self.copies = weakref.WeakSet()
+
+    @staticmethod
+    def current_owner():
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return (threading.get_ident(), task)
+
+    def copy(self):
+        # own Java Region with the same rectangle and settings, pattern and match are only read, so can be shared
+        return SikuliXContext(SikuliXJClass.Region(self.region), self.userDefined, self.pattern, self.match,
+                              self.generation)
+
+    @staticmethod
+    def get(library, main):
+        # context of the library instance for the current thread or task
+        owner = SikuliXContext.current_owner()
+        contexts = _sikulixContexts.get()
+        ctx, ctxOwner = contexts.get(id(library), (None, None)) if contexts else (None, None)
+        if ctx != None and ctx.generation != main.generation:
+            ctx = None
+        if ctx != None and ctxOwner == owner:
+            return ctx
+
+        # first use in this thread or task; a context inherited from the parent task is copied, not shared
+        if main.owner == owner:
+            ctx = main
+        else:
+            ctx = (ctx or main).copy()
+            main.copies.add(ctx)
+        SikuliXContext._bind(library, ctx, owner)
+        return ctx
+
+    @staticmethod
+    def _bind(library, ctx, owner):
+        contexts = dict(_sikulixContexts.get() or {})
+        contexts[id(library)] = (ctx, owner)
+        return _sikulixContexts.set(contexts)
+
+    @staticmethod
+    def all(main):
+        # the main context and the current contexts of all threads and tasks
+        return [main] + [ctx for ctx in list(main.copies) if ctx.generation == main.generation]
+
+    @staticmethod
+    def reset(main):
+        # all contexts copied so far from the main context become stale
+        main.generation += 1
+
+    @staticmethod
+    def run(library, ctx, fn, *args, **kwargs):
+        # run fn in the current thread with the context of another thread or task, e.g. in a thread pool on behalf
+        # of an asyncio task; the context is bound only in the contextvars of this call, the owner is not changed
+        token = SikuliXContext._bind(library, ctx, SikuliXContext.current_owner())
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _sikulixContexts.reset(token)
+
+    @staticmethod
+    def field(name):
+        # library attribute stored in the context of the current thread or task
+        def fget(self):
+            return getattr(self._context(), name)
+        def fset(self, value):
+            setattr(self._context(), name, value)
+        return property(fget, fset)
@@ -0,0 +1,88 @@
+# MIT license
+
+from .sikulixjclass import *
+from .sikulixcapture import attach_background_thread
+from .sikulixsettings import SikuliXSettings
+import threading
+
+
+class SikuliXHighlighter():
+    '''
+        Highlights of regions and matches, either blocking as done by SikuliX, or asynchronous: the overlay is
+        switched on and a background timer switches it off, while the keyword returns at once. A budget limits
+        the total highlight time per test.
+    '''
+    def __init__(self):
+        self.mode = 'blocking'
+        self.budget = None
+        self.used = 0.0
+        # SikuliX Highlight and ShowActions settings taken over in async mode
+        self.highlightMatches = False
+        self.showActions = False
+        self.timers = set()
+        # number of pending async highlights by target, the overlay is switched off by the last one
+        self.active = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def setting(name, value=None):
+        # read, or set if value is given, a static field of SikuliX Settings
+        field = SikuliXSettings._settings_field(name)
+        if value == None:
+            return field.get(None)
+        SikuliXSettings._settings_setField(field, value)
+
+    def _allowed(self, seconds):
+        # seconds of the highlight left within the budget of the test
+        with self.lock:
+            if self.budget != None:
+                seconds = min(seconds, max(0.0, self.budget - self.used))
+            self.used += seconds
+        return seconds
+
+    def show(self, target, seconds):
+        # target is a SikuliX Region or Match; returns the seconds it is highlighted
+        seconds = self._allowed(float(seconds))
+        if seconds <= 0:
+            return 0
+        if self.mode == 'blocking':
+            target.highlight(float(seconds))
+            return seconds
+
+        timer = threading.Timer(seconds, self._off, (target,))
+        timer.daemon = True
+        # a target already highlighted stays on until its last highlight ends; switched on and off within the
+        # lock, so that a timer ending meanwhile cannot switch off the new highlight
+        with self.lock:
+            count = self.active.get(target, 0)
+            self.active[target] = count + 1
+            self.timers.add(timer)
+            if count == 0:
+                target.highlightOn()
+        timer.start()
+        return seconds
+
+    def _off(self, target):
+        attach_background_thread()
+        with self.lock:
+            self.timers.discard(threading.current_thread())
+            count = self.active.get(target, 0) - 1
+            if count > 0:
+                self.active[target] = count
+            elif self.active.pop(target, None) != None:
+                target.highlightOff()
+
+    def cancel(self):
+        # pending timers are dropped and their highlights switched off, e.g. when all highlights are switched off
+        with self.lock:
+            timers, self.timers = self.timers, set()
+            targets, self.active = list(self.active), {}
+        for timer in timers:
+            timer.cancel()
+        for target in targets:
+            target.highlightOff()
+
+    def reset(self):
+        # start of a test: full budget again
+        with self.lock:
+            self.used = 0.0
@@ -0,0 +1,81 @@
+# MIT license
+
+import os, re, tempfile, threading, time
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class SikuliXHostLock():
+    '''
+        Lock shared by all processes on the host using the same lock file, e.g. pabot workers sharing one display.
+        It is a lock on the file, so it is released by the operating system also when a process dies. Within the
+        process the lock is reentrant.
+    '''
+    def __init__(self, path=None, timeout=None):
+        self.path = SikuliXHostLock.default_path() if path == None else path
+        self.timeout = None if timeout == None else float(timeout)
+        self.lock = threading.RLock()
+        self.count = 0
+        self.file = None
+
+    @staticmethod
+    def default_path():
+        # one lock per display, in the temporary directory shared by the workers
+        display = os.getenv('DISPLAY') or 'default'
+        return os.path.join(tempfile.gettempdir(), 'sikulix-input-%s.lock' % re.sub(r'[^\w.-]', '_', display))
+
+    def acquire(self):
+        self.lock.acquire()
+        if self.count == 0:
+            try:
+                self._lock_file()
+            except:
+                self.lock.release()
+                raise
+        self.count += 1
+
+    def release(self):
+        self.count -= 1
+        if self.count == 0:
+            self._unlock_file()
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+    def _lock_file(self):
+        if self.file == None:
+            self.file = open(self.path, 'a+')
+        deadline = None if self.timeout == None else time.time() + self.timeout
+        while True:
+            try:
+                if os.name == 'nt':
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except OSError:
+                if deadline != None and time.time() > deadline:
+                    raise Exception('Timeout waiting for host input lock: {}'.format(self.path))
+                time.sleep(0.01)
+
+    def _unlock_file(self):
+        if os.name == 'nt':
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        if self.file != None:
+            self.file.close()
+            self.file = None
@@ -50,4 +50,22 @@ class SikuliXImagePath(SikuliXJClass):
         '''
         imgPath = list(SikuliXJClass.ImagePath.getPaths())
         for p in imgPath:
-            logger.trace("Image PATH: " + str(p))
+            lazyLogger.trace("Image PATH: %s", p)
+
+    @not_keyword
+    def _imagePath_snapshot(self):
+        bundle = SikuliXJClass.ImagePath.getBundlePath()
+        return (None if bundle == None else str(bundle), [str(p.getPath()) for p in SikuliXJClass.ImagePath.getPaths()
+                                                           if p != None and p.getPath() != None])
+
+    @not_keyword
+    def _imagePath_restore(self, snapshot):
+        if self._imagePath_snapshot() == snapshot:
+            return
+        bundle, paths = snapshot
+        SikuliXJClass.ImagePath.reset()
+        if bundle != None:
+            SikuliXJClass.ImagePath.setBundlePath(bundle)
+        for path in paths:
+            if path != bundle:
+                SikuliXJClass.ImagePath.add(path)
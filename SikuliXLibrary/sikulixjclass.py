@@ -1,6 +1,6 @@
 # MIT license
 
-import os, time, subprocess, logging, sys
+import os, time, subprocess, logging, sys, select
 from py4j.java_gateway import GatewayParameters
 
 # Check which Python Java bridge to use between JPype and Py4J. When SIKULI_PY4J environment variable is defined with value 1
@@ -34,6 +34,63 @@ libLogger.setLevel(level=logging.INFO)
 logging.getLogger("py4j").setLevel(logging.ERROR)
 
 
+class SikuliXLazyLogger():
+    '''
+        Robot logger that formats a message only when the current Robot log level shows it. The message is either
+        a format string with % arguments, or a callable returning the message, so that Java objects are converted
+        to string, and Java fields are read, only for messages that are really logged.
+
+        | lazyLogger.trace('Region: %s; Pattern: %s', self.appRegion, self.appPattern)
+        | lazyLogger.info(lambda: 'Active area {} {}'.format(self.appRegion.x, self.appRegion.y))
+    '''
+    levels = {'TRACE': 0, 'DEBUG': 1, 'INFO': 2, 'WARN': 3, 'ERROR': 4, 'NONE': 5}
+
+    def __init__(self):
+        self.builtIn = None
+        self.level = None
+
+    def refresh(self):
+        # ${LOG LEVEL} follows --loglevel and Set Log Level; outside Robot Framework INFO is used. Read again by
+        # the library listener at the start of suites and tests and after Set Log Level
+        try:
+            if self.builtIn == None:
+                from robot.libraries.BuiltIn import BuiltIn
+                self.builtIn = BuiltIn()
+            level = self.builtIn.get_variable_value('${LOG LEVEL}', 'INFO')
+        except Exception:
+            level = 'INFO'
+        self.level = self.levels.get(str(level).upper(), 2)
+
+    def threshold(self):
+        if self.level == None:
+            self.refresh()
+        return self.level
+
+    def enabled(self, level):
+        return self.levels[level] >= self.threshold()
+
+    def write(self, level, msg, args, html=False):
+        if not self.enabled(level):
+            return
+        if callable(msg):
+            msg = msg()
+        elif args:
+            msg = msg % args
+        logger.write(msg, level, html)
+
+    def trace(self, msg, *args, html=False):
+        self.write('TRACE', msg, args, html)
+
+    def debug(self, msg, *args, html=False):
+        self.write('DEBUG', msg, args, html)
+
+    def info(self, msg, *args, html=False):
+        self.write('INFO', msg, args, html)
+
+
+lazyLogger = SikuliXLazyLogger()
+
+
 class SikuliXJClass():
     '''
         Main class holding JPype JClasses or Py4J gateway classes used by SikuliX library
@@ -44,6 +101,7 @@ class SikuliXJClass():
     Region = None
     Pattern = None
     Match = None
+    Location = None
     Key = None
     KeyModifier = None
     App = None
@@ -52,15 +110,28 @@ class SikuliXJClass():
     ImagePath = None
     Settings = None
     Debug = None
+    BufferedImage = None
+    ImageIO = None
+    ByteArrayOutputStream = None
+    RenderingHints = None
+    IIOImage = None
+    ImageWriteParam = None
+    ByteBuffer = None
+    MessageDigest = None
     JavaGW = None
     Py4JProcess = None
+    XvfbProcess = None
+    ShutdownHooks = []
 
 
     @not_keyword
-    def __init__(self, sikuli_path=''):
+    def __init__(self, sikuli_path='', virtualDisplay=None):
         self._init_python_console_logger()
         libLogger.debug('PY4J env variable: %s' % os.getenv('SIKULI_PY4J'))
         if not SikuliXJClass.Initialized:
+            # the display must be known before the JVM starts
+            if virtualDisplay:
+                self._start_virtual_display(virtualDisplay)
             if useJpype:
                 self._jvm_sikuli_init(sikuli_path)
             else:
@@ -76,6 +147,60 @@ class SikuliXJClass():
         consoleHandler.setFormatter(logFormatter)
         libLogger.addHandler(consoleHandler)
 
+    @not_keyword
+    def _start_virtual_display(self, virtualDisplay):
+        # virtualDisplay is True for a 1920x1080x24 screen, or the screen as WxH or WxHxDepth, e.g. 1280x1024x16
+        if not sys.platform.startswith('linux'):
+            raise Exception("Virtual display with Xvfb is supported only on Linux.")
+        if SikuliXJClass.XvfbProcess != None and SikuliXJClass.XvfbProcess.poll() == None:
+            return
+        screen = '1920x1080x24' if str(virtualDisplay).lower() == 'true' else str(virtualDisplay)
+        if screen.count('x') == 1:
+            screen += 'x24'
+
+        # Xvfb chooses a free display number and writes it to the given file descriptor, so that parallel 
+        # workers never race for the same display. With -terminate, it exits also when the JVM dies unexpectedly
+        read_fd, write_fd = os.pipe()
+        try:
+            SikuliXJClass.XvfbProcess = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', screen,
+                                                          '-nolisten', 'tcp', '-terminate'], pass_fds=(write_fd,),
+                                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            os.close(read_fd)
+            raise Exception("Xvfb not found, it is needed for virtualDisplay.")
+        finally:
+            os.close(write_fd)
+
+        display = b''
+        try:
+            while not display.endswith(b'\n'):
+                ready, _, _ = select.select([read_fd], [], [], 10)
+                if not ready:
+                    raise Exception("Xvfb did not start within 10 seconds.")
+                data = os.read(read_fd, 64)
+                if not data:
+                    raise Exception("Xvfb failed to start with screen %s." % screen)
+                display += data
+        except Exception:
+            self._stop_virtual_display()
+            raise
+        finally:
+            os.close(read_fd)
+
+        os.environ['DISPLAY'] = ':' + display.decode().strip()
+        libLogger.info('Xvfb started on display %s with screen %s' % (os.environ['DISPLAY'], screen))
+
+    @not_keyword
+    def _stop_virtual_display(self):
+        if SikuliXJClass.XvfbProcess == None:
+            return
+        SikuliXJClass.XvfbProcess.terminate()
+        try:
+            SikuliXJClass.XvfbProcess.wait(5)
+        except subprocess.TimeoutExpired:
+            SikuliXJClass.XvfbProcess.kill()
+        SikuliXJClass.XvfbProcess = None
+
     @not_keyword
     def _handle_sikuli_path(self, sikuli_path):
         # Check type of sikuli_path: empty for path from SIKULI_HOME + sikulix.jar, not empty might be either jar name or full path
@@ -115,6 +240,9 @@ class SikuliXJClass():
         SikuliXJClass.Region = JClass("org.sikuli.script.Region")
         SikuliXJClass.Pattern = JClass('org.sikuli.script.Pattern')
         SikuliXJClass.Match = JClass('org.sikuli.script.Match')
+        SikuliXJClass.Finder = JClass('org.sikuli.script.Finder')
+        SikuliXJClass.Image = JClass('org.sikuli.script.Image')
+        SikuliXJClass.Location = JClass('org.sikuli.script.Location')
         
         SikuliXJClass.Key = JClass('org.sikuli.script.Key')
         SikuliXJClass.KeyModifier = JClass('org.sikuli.script.KeyModifier')
@@ -123,6 +251,16 @@ class SikuliXJClass():
         SikuliXJClass.FindFailedResponse = JClass('org.sikuli.script.FindFailedResponse')
         SikuliXJClass.Settings = JClass('org.sikuli.basics.Settings')
         SikuliXJClass.Debug = JClass('org.sikuli.basics.Debug')
+        SikuliXJClass.BufferedImage = JClass('java.awt.image.BufferedImage')
+        SikuliXJClass.ImageIO = JClass('javax.imageio.ImageIO')
+        SikuliXJClass.Runtime = JClass('java.lang.Runtime')
+        SikuliXJClass.System = JClass('java.lang.System')
+        SikuliXJClass.ByteArrayOutputStream = JClass('java.io.ByteArrayOutputStream')
+        SikuliXJClass.RenderingHints = JClass('java.awt.RenderingHints')
+        SikuliXJClass.IIOImage = JClass('javax.imageio.IIOImage')
+        SikuliXJClass.ImageWriteParam = JClass('javax.imageio.ImageWriteParam')
+        SikuliXJClass.ByteBuffer = JClass('java.nio.ByteBuffer')
+        SikuliXJClass.MessageDigest = JClass('java.security.MessageDigest')
 
     @not_keyword
     def _py4j_sikuli_init(self, sikuli_path):
@@ -166,6 +304,9 @@ class SikuliXJClass():
         SikuliXJClass.Region = JavaGW.jvm.org.sikuli.script.Region
         SikuliXJClass.Pattern = JavaGW.jvm.org.sikuli.script.Pattern
         SikuliXJClass.Match = JavaGW.jvm.org.sikuli.script.Match
+        SikuliXJClass.Finder = JavaGW.jvm.org.sikuli.script.Finder
+        SikuliXJClass.Image = JavaGW.jvm.org.sikuli.script.Image
+        SikuliXJClass.Location = JavaGW.jvm.org.sikuli.script.Location
         
         SikuliXJClass.Key = JavaGW.jvm.org.sikuli.script.Key
         SikuliXJClass.KeyModifier = JavaGW.jvm.org.sikuli.script.KeyModifier
@@ -174,6 +315,16 @@ class SikuliXJClass():
         SikuliXJClass.FindFailedResponse = JavaGW.jvm.org.sikuli.script.FindFailedResponse
         SikuliXJClass.Settings = JavaGW.jvm.org.sikuli.basics.Settings
         SikuliXJClass.Debug = JavaGW.jvm.org.sikuli.basics.Debug
+        SikuliXJClass.BufferedImage = JavaGW.jvm.java.awt.image.BufferedImage
+        SikuliXJClass.ImageIO = JavaGW.jvm.javax.imageio.ImageIO
+        SikuliXJClass.Runtime = JavaGW.jvm.java.lang.Runtime
+        SikuliXJClass.System = JavaGW.jvm.java.lang.System
+        SikuliXJClass.ByteArrayOutputStream = JavaGW.jvm.java.io.ByteArrayOutputStream
+        SikuliXJClass.RenderingHints = JavaGW.jvm.java.awt.RenderingHints
+        SikuliXJClass.IIOImage = JavaGW.jvm.javax.imageio.IIOImage
+        SikuliXJClass.ImageWriteParam = JavaGW.jvm.javax.imageio.ImageWriteParam
+        SikuliXJClass.ByteBuffer = JavaGW.jvm.java.nio.ByteBuffer
+        SikuliXJClass.MessageDigest = JavaGW.jvm.java.security.MessageDigest
         
     @keyword
     def log_java_bridge(self):
@@ -191,11 +342,17 @@ class SikuliXJClass():
     @keyword
     def destroy_vm(self):
         '''
-            Shutdown the Java Virtual Machine used by JPype or JavaGateway from Py4J
+            Shutdown the Java Virtual Machine used by JPype or JavaGateway from Py4J, and the Xvfb virtual display
+            started for it with ``virtualDisplay`` library argument
         '''
+        # stop background work that still needs the JVM, e.g. pending screenshot writes
+        for hook in SikuliXJClass.ShutdownHooks:
+            hook()
         SikuliXJClass.Initialized = False
         if useJpype:
             jpype.shutdownJVM()
         elif SikuliXJClass.Py4JProcess:
             SikuliXJClass.JavaGW.shutdown()
             SikuliXJClass.Py4JProcess.kill()
+        # virtual display started for this JVM, if any
+        self._stop_virtual_display()
@@ -0,0 +1,104 @@
+# MIT license
+
+from .sikulixjclass import *
+import functools, time
+
+
+class SikuliXKeySequence():
+    '''
+        Key sequence compiled into the smallest number of SikuliX type calls. Text and special keys are merged
+        into one string, since SikuliX encodes special keys as characters; only chords and pauses need own steps.
+
+        Syntax:
+            - text - typed as it is
+            - {KEY} - special key, by name of a SikuliX Key constant, e.g. {ENTER}, {TAB}, {F5}, {PAGE_DOWN}
+            - {KEY n} - key repeated n times, e.g. {BACKSPACE 5}
+            - {MOD+KEY} - chord of modifiers (CTRL, ALT, SHIFT, META, CMD, WIN, ALTGR) with a key or character,
+              e.g. {CTRL+A}, {CTRL+SHIFT+END}
+            - {WAIT seconds} - pause, e.g. {WAIT 0.5}
+            - {{ and }} - literal braces
+    '''
+    modifiers = ('CTRL', 'ALT', 'SHIFT', 'META', 'CMD', 'WIN', 'ALTGR')
+    # Key constant values by name, resolved once by reflection
+    keys = {}
+
+    def __init__(self, steps):
+        # ('type', text, modifiers or None) or ('wait', seconds)
+        self.steps = steps
+
+    @staticmethod
+    def key(name):
+        if name not in SikuliXKeySequence.keys:
+            try:
+                value = SikuliXJClass.Key().getClass().getDeclaredField(name).get(None)
+            except Exception:
+                raise Exception('Unknown key: {}'.format(name))
+            SikuliXKeySequence.keys[name] = str(value)
+        return SikuliXKeySequence.keys[name]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def compile(sequence):
+        steps = []
+        text = []
+
+        def flush():
+            if text:
+                steps.append(('type', ''.join(text), None))
+                del text[:]
+
+        i = 0
+        while i < len(sequence):
+            if sequence.startswith('{{', i) or sequence.startswith('}}', i):
+                text.append(sequence[i])
+                i += 2
+                continue
+            if sequence[i] != '{':
+                text.append(sequence[i])
+                i += 1
+                continue
+
+            end = sequence.find('}', i + 2)
+            if end < 0:
+                raise Exception('Missing }} in key sequence: {}'.format(sequence))
+            token = sequence[i + 1:end].strip()
+            i = end + 1
+
+            name, _, count = token.partition(' ')
+            if name.upper() == 'WAIT':
+                flush()
+                steps.append(('wait', float(count)))
+                continue
+            count = int(count) if count else 1
+
+            # the key itself can be + e.g. {CTRL++}
+            if name.endswith('++'):
+                mods, key = name[:-2].split('+'), '+'
+            else:
+                parts = name.split('+')
+                mods, key = parts[:-1], parts[-1]
+            key = key if len(key) == 1 else SikuliXKeySequence.key(key.upper())
+
+            if mods:
+                for mod in mods:
+                    if mod.upper() not in SikuliXKeySequence.modifiers:
+                        raise Exception('Unknown modifier {} in key sequence: {}'.format(mod, sequence))
+                flush()
+                # an upper case character would add shift, {CTRL+A} is meant as ctrl and a
+                key = key.lower() if len(key) == 1 else key
+                chord = ''.join(SikuliXKeySequence.key(mod.upper()) for mod in mods)
+                steps.append(('type', key * count, chord))
+            else:
+                text.append(key * count)
+        flush()
+        return SikuliXKeySequence(steps)
+
+    def run(self, target):
+        # target is a Region or Screen; one bridge call per step
+        for step in self.steps:
+            if step[0] == 'wait':
+                time.sleep(step[1])
+            elif step[2] == None:
+                target.type(step[1])
+            else:
+                target.type(step[1], step[2])
@@ -84,6 +84,16 @@ class SikuliXLibrary(SikuliXRegion,
         If implicit find operation is needed, assume the region is the whole screen.
         
         Region Click with no arguments will either click the center of the last used Region or the lastMatch, if any is available.
+        
+        Regions used repeatedly, e.g. a sidebar and a toolbar, can be defined once with `Region Define` and given by
+        name to the keywords, e.g. ``Region Click  save.png  region=toolbar``, instead of calling `Region SetRect`
+        before each keyword.
+        = Concurrency =
+        The active region, its auto wait, the last pattern and last match are kept per thread or asyncio task. When the
+        library is used from another thread or task, it starts with a copy of the state of the thread that imported
+        the library, and its changes (e.g. `Region SetRect`) are not seen by other threads. Searches and OCR on
+        different regions can run in parallel, while mouse and keyboard actions are done one at a time. With
+        `Set HostInputLock`, the input is also done one at a time by all processes sharing the display.
         = Debugging =
         When writing test cases and keywords it is important to understand the precise effect of the code written.
         The following tools can help to understand what's going on, in order of detail level:
@@ -94,14 +104,63 @@ class SikuliXLibrary(SikuliXRegion,
             - Once logging of the SikuliX core engine is enabled, more logging sections can be enabled using the
             `DebugLogs`, `ProfileLogs` and `TraceLogs` switches, see `Settings Set`.
     '''
+    ROBOT_LISTENER_API_VERSION = 2
+
     @not_keyword
-    def __init__(self, sikuli_path='', image_path='', logImages=True, centerMode=False):
+    def __init__(self, sikuli_path='', image_path='', logImages=True, centerMode=False, logImageOptions=None,
+                 logImageRetention=None, hostInputLock=False, virtualDisplay=None):
         '''
         | sikuli_path | Path to sikulix.jar file. If empty, it will try to use SIKULI_HOME environment variable. |
         | image_path |  Initial path to image library. More paths can be added later with the keyword `Image Path Add` |
         | logImages | Default True, if screen captures of found images and whole screen if not found, are logged in the final result log.html file |
         | centerMode | Default False, if should calculate the click offset relative to center of the image or relative to upper left corner. |
+        | logImageOptions | Encoding of the logged images, e.g. ``format=jpeg, quality=0.8, maxSize=1280, cropMargin=50``. See `Set LogImageOptions` |
+        | logImageRetention | Limits for the number and size of logged images, e.g. ``maxTestImages=20, strategy=keep-last``. See `Set LogImageRetention` |
+        | hostInputLock | Default False. True, or the path of a lock file, to do mouse and keyboard input one process at a time, e.g. for pabot workers sharing a display. See `Set HostInputLock` |
+        | virtualDisplay | Linux only. True, or a screen size as WxH or WxHxDepth (default 1920x1080x24), to start a dedicated Xvfb display for this process and run SikuliX on it, e.g. one per pabot worker. It is stopped by `Destroy VM` |
         '''
-        SikuliXJClass.__init__(self, sikuli_path)
+        # the library is also its own listener, e.g. to flush pending screenshots at the end of suite
+        self.ROBOT_LIBRARY_LISTENER = self
+        SikuliXJClass.__init__(self, sikuli_path, virtualDisplay)
         SikuliXImagePath.__init__(self, image_path)
-        SikuliXRegion.__init__(self, logImages, centerMode)
+        SikuliXApp.__init__(self)
+        SikuliXRegion.__init__(self, logImages, centerMode, logImageOptions, logImageRetention, hostInputLock)
+        # initial state, restored by Reset State
+        self.initialState = self._state_snapshot()
+
+    @not_keyword
+    def _state_snapshot(self):
+        return {'imagePath': self._imagePath_snapshot(), 'settings': self._settings_snapshot(),
+                'region': self._region_snapshot()}
+
+    @keyword
+    def snapshot_state(self):
+        '''
+        Take the current state as the state restored by `Reset State`, instead of the state at library import,
+        e.g. after a common setup of image paths and settings.
+
+        | Snapshot State |
+        '''
+        self.initialState = self._state_snapshot()
+
+    @keyword
+    def reset_state(self):
+        '''
+        Restore the library state taken at library import (or by `Snapshot State`), without restarting the JVM.
+        Meant for harnesses running many scenarios with one library instance, since a JVM cannot be started again
+        in the same process after `Destroy VM`. Restored are:
+            - ImagePath entries
+            - SikuliX Settings, e.g. MinSimilarity, Highlight, ShowActions, MoveMouseDelay
+            - active region, its auto wait timeout and FindFailedResponse, user defined rectangle, last pattern and
+            match, text index, offset center mode and default region select mode. Other threads and asyncio tasks 
+            drop their own copy of this state, and take a new copy of the restored state at their next keyword
+            - input provider, highlight mode, and cached application handles and windows
+        Regions defined with `Region Define` are removed.
+
+        | Reset State |
+        '''
+        self._imagePath_restore(self.initialState['imagePath'])
+        self._region_restore(self.initialState['region'])
+        self._settings_restore(self.initialState['settings'])
+        self.apps = {}
+        lazyLogger.debug('Library state reset')
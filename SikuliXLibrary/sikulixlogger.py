@@ -1,8 +1,13 @@
 # MIT license
 
 from .sikulixjclass import *
+from .sikulixcapture import *
+from .sikulixretention import *
+from .sikulixtiming import *
+from .sikulixmemory import *
+from .sikulixcontext import *
 from os.path import relpath
-import datetime, shutil
+import collections, datetime, hashlib, os, threading, time
 
 
 class SikuliXLogger():
@@ -10,9 +15,11 @@ class SikuliXLogger():
         Class handling the logging of source images, matches and screenshots within robot log.html file
     '''
     resultDir: str = '.'
+    writer: SikuliXArtifactWriter = SikuliXArtifactWriter()
+    imageExtensions = {'png': '.png', 'jpeg': '.jpg', 'webp': '.webp'}
 
     @not_keyword
-    def __init__(self, logImages=True):
+    def __init__(self, logImages=True, logImageOptions=None, logImageRetention=None):
         self.passedLogImages = False
         self.failedLogImages = False           
         self.notFoundLogImages = False
@@ -20,7 +27,40 @@ class SikuliXLogger():
         if logImages:
             self.passedLogImages = True
             self.failedLogImages = True
-            
+
+        # content addressed images already written or queued, and the perceptual hashes of the latest ones
+        self.storedImages = set()
+        self.recentImages = collections.deque(maxlen=256)
+        # images replaced by a placeholder by the keep-last retention strategy, to be written again if needed
+        self.releasedImages = set()
+        self.storedLock = threading.RLock()
+
+        self.logImageOptions = {'format': 'png', 'quality': None, 'maxSize': 0, 'scale': 1.0, 'cropMargin': -1,
+                                'dedup': False, 'dedupThreshold': 0, 'thumbnailSize': 0}
+        if logImageOptions:
+            if isinstance(logImageOptions, str):
+                # e.g. format=jpeg, quality=0.8, maxSize=1280
+                logImageOptions = dict(opt.strip().split('=', 1) for opt in logImageOptions.split(','))
+            self.set_logImageOptions(**logImageOptions)
+
+        self.logImagePolicy = SikuliXRetentionPolicy()
+        if logImageRetention:
+            if isinstance(logImageRetention, str):
+                # e.g. maxTestImages=20, strategy=keep-last
+                logImageRetention = dict(opt.strip().split('=', 1) for opt in logImageRetention.split(','))
+            self.set_logImageRetention(**logImageRetention)
+
+        # per keyword phase timing, disabled until Start Timing
+        self.timing = SikuliXTiming()
+        # memory statistics sampled to the timing records, see Start MemorySampling
+        self.memorySampler = SikuliXMemory(self.timing)
+        SikuliXJClass.ShutdownHooks.append(self.memorySampler.stop)
+
+        self.frameBuffer = SikuliXFrameBuffer()
+        SikuliXJClass.ShutdownHooks.append(self.frameBuffer.stop)
+        if SikuliXLogger.writer.stop not in SikuliXJClass.ShutdownHooks:
+            SikuliXJClass.ShutdownHooks.append(SikuliXLogger.writer.stop)
+
         #libLogger.debug('SikuliXLogger init')
 
     @keyword
@@ -65,6 +105,327 @@ class SikuliXLogger():
         self.notFoundLogImages = mode
         return scr
 
+    @keyword
+    def set_logImageOptions(self, format=None, quality=None, maxSize=None, scale=None, cropMargin=None,
+                            dedup=None, dedupThreshold=None, thumbnailSize=None):
+        '''
+        Set how the logged images (matches and screenshots) are encoded. Only the given options are changed, and
+        the previous options are returned, so that these can be restored later. The same options can be given
+        at library import with ``logImageOptions``, e.g. ``logImageOptions=format=jpeg, quality=0.8, maxSize=1280``
+        
+        | format | png (default), jpeg or webp. webp needs a Java ImageIO webp plugin, otherwise png is used |
+        | quality | Compression quality 0.0...1.0. If not given, the default of the format is used |
+        | maxSize | Maximum width or height of the logged image in pixels, 0 (default) for no limit |
+        | scale | Scale factor 0.0...1.0 applied to the logged image, default 1.0 |
+        | cropMargin | If 0 or more, screenshots for failed or not found searches are cropped to the active region, \
+            extended with this margin in pixels. Default -1 logs the whole screen |
+        | dedup | If True, images are named by the hash of their content, so that identical images are written \
+            once and referenced from every log entry. The hash is taken from a grayscale copy downscaled to at \
+            most 320 pixels, images differing only below that resolution are seen as identical. Default False |
+        | dedupThreshold | With dedup, also reuse a recent image of the same size if the hamming distance of the \
+            perceptual hashes (0...64) is at most this value. Default 0 reuses only identical images |
+        | thumbnailSize | If more than 0, a thumbnail with this maximum width or height is written next to each \
+            image in a ``thumbs`` folder, and the log embeds the thumbnail, linked to the full image. Default 0 |
+        
+        | ${prev} | Set LogImageOptions | format=jpeg | quality=0.7 | maxSize=1280 |
+        | Set LogImageOptions | cropMargin=50 |
+        | Set LogImageOptions | dedup=${True} | dedupThreshold=4 |
+        | Set LogImageOptions | thumbnailSize=200 |
+        | Set LogImageOptions | &{prev} |
+        '''
+        previous = dict(self.logImageOptions)
+        options = self.logImageOptions
+        if format != None:
+            format = str(format).lower()
+            if format == 'jpg':
+                format = 'jpeg'
+            if format not in SikuliXLogger.imageExtensions:
+                raise Exception('Unsupported image format: {}'.format(format))
+            if format == 'webp' and not SikuliXFrame.can_encode(format):
+                logger.warn('WARNING: No ImageIO writer for webp available, png is used instead')
+                format = 'png'
+            options['format'] = format
+        if quality != None:
+            options['quality'] = None if str(quality) == 'None' else float(quality)
+        if maxSize != None:
+            options['maxSize'] = int(maxSize)
+        if scale != None:
+            options['scale'] = float(scale)
+        if cropMargin != None:
+            options['cropMargin'] = int(cropMargin)
+        if dedup != None:
+            options['dedup'] = dedup if isinstance(dedup, bool) else str(dedup).lower() == 'true'
+        if dedupThreshold != None:
+            options['dedupThreshold'] = int(dedupThreshold)
+        if thumbnailSize != None:
+            options['thumbnailSize'] = int(thumbnailSize)
+        return previous
+
+    @keyword
+    def start_frameBuffer(self, seconds=5, rate=2, maxSize=480):
+        '''
+        Start sampling the screen in background, keeping in memory only the frames of the last given seconds.
+        When a keyword fails and `Set FailedLogImages` is enabled, this history is logged as a strip of frames,
+        to show what happened on screen before the failure. Nothing is written to disk while keywords pass.
+        
+        | seconds | Length of the history, default 5 seconds |
+        | rate | Frames sampled per second, default 2 |
+        | maxSize | Maximum width or height of a sampled frame in pixels, default 480 |
+        
+        | Start FrameBuffer | seconds=10 | rate=1 |
+        '''
+        self.frameBuffer.start(seconds, rate, maxSize)
+
+    @keyword
+    def stop_frameBuffer(self):
+        '''
+        Stop the background sampling started by `Start FrameBuffer` and release the buffered frames.
+        
+        | Stop FrameBuffer |
+        '''
+        self.frameBuffer.stop()
+        self.frameBuffer.clear()
+
+    @keyword
+    def flush_logImages(self):
+        '''
+        Wait until all screenshots taken so far are written to the result directory. Screenshots are written
+        in background, and this is done automatically at the end of every suite and when the library is closed.
+        Useful when using the library directly from Python, before reading the images.
+
+        | Flush LogImages |
+        '''
+        for error in SikuliXLogger.writer.flush():
+            logger.error('FAIL: Capture screenshot path: ' + error)
+
+    @keyword
+    def set_logImageRetention(self, maxTestImages=None, maxTestBytes=None, maxSuiteImages=None, maxSuiteBytes=None,
+                              strategy=None, sampleEvery=None, prunePassed=None):
+        '''
+        Limit how many screenshots and matches are written per test and per suite. Only the given settings are 
+        changed, and the previous settings are returned. The same settings can be given at library import with 
+        ``logImageRetention``, e.g. ``logImageRetention=maxTestImages=20, strategy=keep-last``
+        
+        | maxTestImages | Maximum number of images written per test, 0 (default) for no limit |
+        | maxTestBytes | Maximum size in bytes of the images written per test, 0 (default) for no limit |
+        | maxSuiteImages | Maximum number of images written per suite, 0 (default) for no limit |
+        | maxSuiteBytes | Maximum size in bytes of the images written per suite, 0 (default) for no limit |
+        | strategy | keep-first (default) drops the images above the limit, keep-last makes room for new images \
+            by replacing the oldest ones with an empty 1x1 image, so that their log entries stay valid, sample \
+            keeps only the first and then every N-th image, also without any limit. Without any limit, keep-first \
+            and keep-last keep all images |
+        | sampleEvery | N for the sample strategy, default 1 |
+        | prunePassed | If True, the images in ``matches`` folder logged only by passed tests are removed \
+            when the library is closed, at the end of the run. Default False |
+        
+        Dropped and removed images are reported in the log, and in total by `Log LogImage Retention Report`.
+        
+        | ${prev} | Set LogImageRetention | maxTestImages=20 | strategy=keep-last |
+        | Set LogImageRetention | maxSuiteBytes=${100000000} | strategy=sample | sampleEvery=10 |
+        | Set LogImageRetention | &{prev} |
+        '''
+        settings = self.logImagePolicy.settings
+        previous = dict(settings)
+        for name, value in (('maxTestImages', maxTestImages), ('maxTestBytes', maxTestBytes),
+                            ('maxSuiteImages', maxSuiteImages), ('maxSuiteBytes', maxSuiteBytes),
+                            ('sampleEvery', sampleEvery)):
+            if value != None:
+                settings[name] = int(value)
+        settings['sampleEvery'] = max(1, settings['sampleEvery'])
+        if strategy != None:
+            if strategy not in SikuliXRetentionPolicy.strategies:
+                raise Exception('Unsupported retention strategy: {}'.format(strategy))
+            settings['strategy'] = strategy
+        if prunePassed != None:
+            settings['prunePassed'] = prunePassed if isinstance(prunePassed, bool) else str(prunePassed).lower() == 'true'
+        return previous
+
+    @keyword
+    def log_logImageRetentionReport(self):
+        '''
+        Log how many images were dropped or removed so far by the limits set with `Set LogImageRetention`, 
+        and return these numbers.
+        
+        | ${report} | Log LogImage Retention Report |
+        '''
+        report = self.logImagePolicy.report()
+        logger.info('Log images dropped: {}, removed: {}, in tests: {}'.format(report['dropped'], report['removed'],
+                                                                              ', '.join(report['tests'])))
+        return report
+
+    @keyword
+    def start_timing(self, exportPath=None, format='jsonl'):
+        '''
+        Start recording for every library keyword the time spent in each phase: bridge (preparing Java objects),
+        match (image search), ocr, lock (waiting for the input lock), action (mouse and keyboard), capture, 
+        log (log messages and images) and queue (waiting for the background image writer). Time not covered by 
+        these is reported as other.
+        
+        | exportPath | If given, the records are written to this file when the library is closed |
+        | format | jsonl (default, one JSON object per keyword call) or csv |
+        
+        | Start Timing |
+        | Start Timing | ${OUTPUT DIR}/timing.csv | format=csv |
+        '''
+        if format not in ('jsonl', 'csv'):
+            raise Exception('Unsupported timing export format: {}'.format(format))
+        self.timing.exportPath = exportPath
+        self.timing.exportFormat = format
+        self.timing.enabled = True
+
+    @keyword
+    def stop_timing(self):
+        '''
+        Stop recording the keyword timing started with `Start Timing`. The records taken so far are kept.
+        
+        | Stop Timing |
+        '''
+        self.timing.enabled = False
+
+    @keyword
+    def export_timing(self, path, format='jsonl'):
+        '''
+        Write the keyword timing recorded so far to a file, as JSON Lines (jsonl) or csv. Returns the path.
+        
+        | Export Timing | ${OUTPUT DIR}/timing.jsonl |
+        | Export Timing | ${OUTPUT DIR}/timing.csv | csv |
+        '''
+        return self.timing.export(path, format)
+
+    @keyword
+    def log_timingSummary(self, by='keyword'):
+        '''
+        Log a table with the number of calls, total time and time per phase, summed by keyword or by image,
+        slowest first. Returns the summary as dictionary.
+        
+        | Log Timing Summary |
+        | ${summary} | Log Timing Summary | by=image |
+        '''
+        if by not in ('keyword', 'image'):
+            raise Exception('Timing summary can be done by keyword or image, not: {}'.format(by))
+        summary = self.timing.summary(by)
+        phases = sorted({p for entry in summary.values() for p in entry if p not in ('calls', 'total')})
+        rows = ['<tr><th>%s</th><th>calls</th><th>total</th>%s</tr>' % (by, ''.join('<th>%s</th>' % p for p in phases))]
+        for key, entry in summary.items():
+            rows.append('<tr><td>%s</td><td>%d</td><td>%.3f</td>%s</tr>' % (key, entry['calls'], entry['total'],
+                        ''.join('<td>%.3f</td>' % entry.get(p, 0.0) for p in phases)))
+        logger.info('<table border="1">%s</table>' % ''.join(rows), True)
+        return summary
+
+    @keyword
+    def get_memoryStats(self):
+        '''
+        Return and log JVM heap and SikuliX image cache usage, as dictionary with sizes in MB: heapUsed,
+        heapCommitted, heapMax, imageCacheUsed, imageCacheMax (limit set by `Set ImageCacheLimit`) and
+        imageCacheCount (number of cached images). Cache values not available in the SikuliX version are None.
+        
+        | ${stats} | Get MemoryStats |
+        '''
+        stats = SikuliXMemory.stats()
+        logger.info(', '.join('{} {}'.format(k, 'n/a' if v == None else round(v, 1)) for k, v in stats.items()))
+        return stats
+
+    @keyword
+    def set_imageCacheLimit(self, mb):
+        '''
+        Set the maximum size in MB of the SikuliX cache of loaded images (``ImageCache`` setting, default 64).
+        When the limit is reached, SikuliX evicts the oldest images; 0 disables the cache. If the cache is already
+        above the new limit, it is cleared at once. Returns the previous limit.
+        
+        | Set ImageCacheLimit | 32 |
+        '''
+        previous = SikuliXMemory.set_cache_limit(int(mb))
+        used = SikuliXMemory.stats()['imageCacheUsed']
+        if used != None and used > int(mb):
+            SikuliXMemory.cleanup()
+        return previous
+
+    @keyword
+    def clear_imageCache(self):
+        '''
+        Release cached images and captures: the SikuliX image cache, the frames kept by the library for
+        logging (text indexes of all threads and tasks, `Start FrameBuffer` history), then run the JVM garbage 
+        collector. Returns the 
+        memory statistics after the cleanup, see `Get MemoryStats`.
+        
+        | Clear ImageCache |
+        '''
+        for ctx in SikuliXContext.all(self.mainContext):
+            ctx.textIndex = None
+        self.frameBuffer.clear()
+        SikuliXMemory.cleanup()
+        return self.get_memoryStats()
+
+    @keyword
+    def start_memorySampling(self, interval=60):
+        '''
+        Sample the memory statistics of `Get MemoryStats` in background every interval seconds. The samples are
+        written to the timing records as entries with keyword ``memory`` while timing is enabled, exported with 
+        `Export Timing` or at the end with the exportPath of `Start Timing`, to size agents and find leaks in 
+        long runs.
+        
+        | Start Timing | ${OUTPUT DIR}/timing.jsonl |
+        | Start MemorySampling | 300 |
+        '''
+        self.memorySampler.start(interval)
+
+    @keyword
+    def stop_memorySampling(self):
+        '''
+        Stop the background sampling started with `Start MemorySampling`.
+        
+        | Stop MemorySampling |
+        '''
+        self.memorySampler.stop()
+
+    @not_keyword
+    def start_suite(self, name, attrs):
+        # library listener method
+        lazyLogger.refresh()
+        self.logImagePolicy.start_suite()
+
+    @not_keyword
+    def end_suite(self, name, attrs):
+        # library listener method
+        self.flush_logImages()
+        self.logImagePolicy.end_suite()
+
+    @not_keyword
+    def start_test(self, name, attrs):
+        # library listener method
+        lazyLogger.refresh()
+        self.logImagePolicy.start_test(attrs['longname'])
+
+    @not_keyword
+    def end_keyword(self, name, attrs):
+        # library listener method, the cached log level is read again after it was changed
+        if attrs['kwname'] == 'Set Log Level' and attrs['libname'] == 'BuiltIn':
+            lazyLogger.refresh()
+
+    @not_keyword
+    def end_test(self, name, attrs):
+        # library listener method
+        dropped, removed = self.logImagePolicy.end_test(attrs['longname'], attrs['status'])
+        if dropped or removed:
+            libLogger.info('%s: %d log images dropped, %d removed by retention policy' % (name, dropped, removed))
+
+    @not_keyword
+    def close(self):
+        # library listener method
+        self.flush_logImages()
+        pruned = 0
+        for path in self.logImagePolicy.prunable():
+            if os.path.exists(path):
+                os.remove(path)
+                pruned += 1
+            thumb_path = SikuliXArtifactWriter.thumbnail_path(path)
+            if os.path.exists(thumb_path):
+                os.remove(thumb_path)
+        if pruned:
+            libLogger.info('%d log images of passed tests pruned' % pruned)
+        if self.timing.exportPath:
+            self.timing.export()
+
     @keyword
     def log_warning(self, msg):
         '''
@@ -76,95 +437,206 @@ class SikuliXLogger():
 
     @not_keyword
     def _screenshot(self, folder="/screenshots/", region=None):
-        # generate unique name for screenshot filename
         if region == None:
-            br = SikuliXJClass.Screen().getBottomRight()
+            br = self.appScreen.getBottomRight()
             region = (0, 0, br.x, br.y)
         
-        name = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f') + ".png"
-        img_src = str(self.appScreen.capture(*region).getFile())
+        with self.timing.phase('capture'):
+            frame = SikuliXFrame.capture(self.appScreen, region)
+        if frame.image == None:
+            return 'Screen capture failed (check resolution)'
+        return self._store_frame(frame, folder)
+
+    @not_keyword
+    def _store_frame(self, frame, folder):
+        path = self._store_frame_path(frame, folder)
+        if path != None and folder == "/matches/":
+            self.logImagePolicy.reference(path)
+        return path
+
+    @not_keyword
+    def _store_frame_path(self, frame, folder):
+        # only the pixels are grabbed at this point, encoding and writing is done by the background writer
+        options = dict(self.logImageOptions)
         full_folder = SikuliXLogger.resultDir + folder
+        if options['dedup']:
+            # lookup and registration of an image are done at once, keywords may log from several threads
+            with self.storedLock:
+                path = self._dedup_path(frame, full_folder, options)
+                if path in self.storedImages:
+                    lazyLogger.trace("Reuse image: %s", path)
+                    return path
+                self.storedImages.add(path)
+            if os.path.exists(path) and path not in self.releasedImages:
+                return path
+        else:
+            # generate unique name for screenshot filename
+            name = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')
+            path = full_folder + name + SikuliXLogger.imageExtensions[options['format']]
 
-        if img_src == None:
-            return 'Screen capture failed (check resolution)'
+        keep, evicted = self.logImagePolicy.admit(path)
+        with self.storedLock:
+            for old in evicted:
+                self.storedImages.discard(old)
+                self.releasedImages.add(old)
+                SikuliXLogger.writer.release(old)
+            if not keep:
+                self.storedImages.discard(path)
+                return None
+            self.releasedImages.discard(path)
+
+        lazyLogger.trace("Matches: %s", path)
+        # blocks only when the writer queue is full
+        with self.timing.phase('queue'):
+            SikuliXLogger.writer.submit(frame, path, options, self.logImagePolicy.account)
+        return path
 
-        try:
-            logger.trace("Screenshot: " + img_src)
-            logger.trace("Matches: " + full_folder + name)
-            shutil.copy(img_src, full_folder + name)
-        except IOError:
-            logger.error('FAIL: Capture screenshot path: ' + full_folder + name)
+    @not_keyword
+    def _dedup_path(self, frame, full_folder, options):
+        # same content with same encoding gives the same file name; the full resolution pixels are hashed by
+        # Java (see SikuliXFrame.digest), so that these do not cross the bridge before the keyword returns
+        encoding = (options['format'], options['quality'], options['maxSize'], options['scale'], options['thumbnailSize'])
+        key = hashlib.sha1(('%s:%r' % (frame.digest(), encoding)).encode()).hexdigest()[:24]
+        path = full_folder + key + SikuliXLogger.imageExtensions[options['format']]
+
+        threshold = options['dedupThreshold']
+        if threshold > 0 and path not in self.storedImages:
+            # only images of the same size, folder and encoding can replace each other
+            group = (frame.w, frame.h, full_folder, encoding)
+            dhash = frame.dhash()
+            for (other_group, other_hash, other_path) in self.recentImages:
+                if (other_group == group and other_path not in self.releasedImages and
+                        bin(other_hash ^ dhash).count('1') <= threshold):
+                    return other_path
+            self.recentImages.append((group, dhash, path))
+        return path
 
-        return full_folder + name
+    @not_keyword
+    def _image_html(self, label, path):
+        # log entry for a logged screenshot or match, or a note when the retention policy dropped it
+        if path == None:
+            return label + ' image dropped by retention policy'
+        rel_path = relpath(path, SikuliXLogger.resultDir)
+        if self.logImageOptions['thumbnailSize'] > 0:
+            thumb_path = relpath(SikuliXArtifactWriter.thumbnail_path(path), SikuliXLogger.resultDir)
+            return label + ' <a href="%s"><img src="%s" loading="lazy" /></a>' % (rel_path, thumb_path)
+        return label + ' <img src="%s" loading="lazy" />' % rel_path
+
+    @not_keyword
+    def _failure_screenshot(self, frame=None):
+        # the frame searched by the failed keyword shows exactly what was searched, if it covers the area of
+        # failure screenshots (see cropMargin); otherwise the area is captured now
+        region = self._failure_region()
+        if frame != None:
+            if region == None:
+                br = self.appScreen.getBottomRight()
+                region = (0, 0, int(br.x), int(br.y))
+            evidence = frame if frame.rect() == tuple(int(v) for v in region) else frame.crop(region)
+            if evidence != None:
+                return self._store_frame(evidence, "/screenshots/")
+        return self._screenshot("/screenshots/", region)
+
+    @not_keyword
+    def _failure_region(self):
+        # area of failure screenshots: whole screen, or the active region extended with the crop margin
+        margin = self.logImageOptions['cropMargin']
+        if margin < 0:
+            return None
+        br = self.appScreen.getBottomRight()
+        x = max(0, self.appRegion.x - margin)
+        y = max(0, self.appRegion.y - margin)
+        w = min(br.x, self.appRegion.x + self.appRegion.w + margin) - x
+        h = min(br.y, self.appRegion.y + self.appRegion.h + margin) - y
+        return (x, y, w, h)
+
+    @not_keyword
+    def _wait_time(self, seconds):
+        # timeout of the search: given seconds, otherwise the auto wait timeout of the region
+        if seconds > 0:
+            return seconds
+        return float(self.appRegion.getAutoWaitTimeout())
+
+    @not_keyword
+    def _searched_frame(self):
+        # frame searched by the keyword now reporting, set just before calling the hooks below; taken only once,
+        # so that a later report never logs the frame of an earlier search
+        frame, self.searchedFrame = self.searchedFrame, None
+        return frame
 
     @not_keyword
     def _passed(self, msg, mode=None):
-        libLogger.debug('PASS %s' % msg)
-        logger.info('PASS: ' + msg)
+        frame = self._searched_frame()
+        with self.timing.phase('log'):
+            libLogger.debug('PASS %s' % msg)
+            logger.info('PASS: ' + msg)
 
-        # matched image
-        last_match: SikuliXJClass.Match = self.appRegion.getLastMatch()
-        # score of match
-        score: float = float(last_match.getScore())
+            # matched image, read from Java only if it is used
+            last_match: SikuliXJClass.Match = None
+            if self.passedLogImages or lazyLogger.enabled('INFO'):
+                last_match = self.appRegion.getLastMatch()
 
-        if self.passedLogImages:
-            if mode == None:
-                # source image
-                src_img: str = str(self.appPattern.getFilename())
-    
-                # get relative path from result directory (log.html)
-                rel_path = relpath(src_img, SikuliXLogger.resultDir)
-                logger.debug('Source Image: <img src="%s" />' % rel_path, True)
+            if self.passedLogImages:
+                if mode == None:
+                    # source image, with relative path from result directory (log.html)
+                    lazyLogger.debug(lambda: 'Source Image: <img src="%s" />' % relpath(str(self.appPattern.getFilename()),
+                                                                                      SikuliXLogger.resultDir), html=True)
 
-            # screenshot of matched image
-            region = (last_match.getX(), last_match.getY(), last_match.getW(), last_match.getH())
-            name = self._screenshot("/matches/", region)
-            rel_path = relpath(name, SikuliXLogger.resultDir)
-            logger.debug('Best Match:   <img src="%s" />' % rel_path, True)
+                # screenshot of matched image, cut from the searched frame when available
+                region = (last_match.getX(), last_match.getY(), last_match.getW(), last_match.getH())
+                frame = frame.crop(region) if frame != None else None
+                if frame != None:
+                    name = self._store_frame(frame, "/matches/")
+                else:
+                    name = self._screenshot("/matches/", region)
+                logger.debug(self._image_html('Best Match:  ', name), True)
         
-        logger.info("Matched with score: %s" % score)
+            # score of match
+            lazyLogger.info(lambda: "Matched with score: %s" % float(last_match.getScore()))
 
     @not_keyword
     def _failed(self, msg, seconds, mode=None):
-        libLogger.debug('FAIL %s' % msg)
-        logger.error('FAIL: ' + msg)
+        frame = self._searched_frame()
+        with self.timing.phase('log'):
+            libLogger.debug('FAIL %s' % msg)
+            logger.error('FAIL: ' + msg)
 
-        if self.failedLogImages:
-            if mode == None:
-                # source image
-                src_img: str = str(self.appPattern.getFilename())
-                rel_path = relpath(src_img, SikuliXLogger.resultDir)
-                logger.info('Source Image: <img src="%s" />' % rel_path, True, True)
+            if self.failedLogImages:
+                if mode == None:
+                    # source image
+                    src_img: str = str(self.appPattern.getFilename())
+                    rel_path = relpath(src_img, SikuliXLogger.resultDir)
+                    logger.info('Source Image: <img src="%s" />' % rel_path, True, True)
     
-            # screenshot
-            name = self._screenshot("/screenshots/")
-            rel_path = relpath(name, SikuliXLogger.resultDir)
-            logger.info('No Match: <img src="%s" />' % rel_path, True, True)
+                # screenshot
+                name = self._failure_screenshot(frame)
+                logger.info(self._image_html('No Match:', name), True, True)
 
-        if mode == None:        
-            wait: float = float(self.appRegion.getAutoWaitTimeout())
-            if seconds > 0:
-                wait: float = seconds
-            logger.debug('Image not visible after ' + str(wait) + ' seconds')
-        raise Exception(msg)
+                # screen history before the failure
+                frames = self.frameBuffer.history()
+                if frames:
+                    name = self._store_frame(SikuliXFrame.strip(frames), "/screenshots/")
+                    label = 'Frame History ({:.1f}s before failure):'.format(time.time() - frames[0].timestamp)
+                    logger.info(self._image_html(label, name), True, True)
+
+            if mode == None:
+                lazyLogger.debug(lambda: 'Image not visible after %s seconds' % self._wait_time(seconds))
+            raise Exception(msg)
 
     @not_keyword
     def _notfound(self, msg, seconds, mode=None):
-        libLogger.debug('NOT FOUND %s' % msg)
-        if self.notFoundLogImages:
-            if mode == None:
-                # source image
-                src_img: str = str(self.appPattern.getFilename())
-                rel_path = relpath(src_img, SikuliXLogger.resultDir)
-                logger.info('Source Image: <img src="%s" />' % rel_path, True, True)
+        frame = self._searched_frame()
+        with self.timing.phase('log'):
+            libLogger.debug('NOT FOUND %s' % msg)
+            if self.notFoundLogImages:
+                if mode == None:
+                    # source image
+                    src_img: str = str(self.appPattern.getFilename())
+                    rel_path = relpath(src_img, SikuliXLogger.resultDir)
+                    logger.info('Source Image: <img src="%s" />' % rel_path, True, True)
     
-            # screenshot
-            name = self._screenshot("/screenshots/")
-            rel_path = relpath(name, SikuliXLogger.resultDir)
-            logger.info('Not Found: <img src="%s" />' % rel_path, True, True)
-        
-        if mode == None:
-            wait: float = float(self.appRegion.getAutoWaitTimeout())
-            if seconds > 0:
-                wait: float = seconds
-            logger.debug('Image not visible after ' + str(wait) + ' seconds')
+                # screenshot
+                name = self._failure_screenshot(frame)
+                logger.info(self._image_html('Not Found:', name), True, True)
+        
+            if mode == None:
+                lazyLogger.debug(lambda: 'Image not visible after %s seconds' % self._wait_time(seconds))
@@ -0,0 +1,89 @@
+# MIT license
+
+from .sikulixjclass import *
+from .sikulixcapture import attach_background_thread
+from .sikulixsettings import SikuliXSettings
+import threading
+
+if not useJpype:
+    from .sikulixpy4j import *
+
+MB = 1024.0 * 1024.0
+
+
+class SikuliXMemory():
+    '''
+        JVM heap and SikuliX image cache statistics, and an optional background sampler writing them to the
+        timing records, see Start Timing, to follow the memory use of long runs.
+    '''
+    def __init__(self, timing):
+        self.timing = timing
+        self.thread = None
+        self.stopEvent = threading.Event()
+
+    @staticmethod
+    def _static_field(jclass, name):
+        # value of a static field, also private ones like the cache counters of SikuliX Image; None if missing
+        try:
+            if useJpype:
+                field = jclass.class_.getDeclaredField(name)
+            else:
+                field = get_java_class(jclass).getDeclaredField(name)
+            field.setAccessible(True)
+            return field.get(None)
+        except Exception:
+            return None
+
+    @staticmethod
+    def stats():
+        # sizes in MB
+        runtime = SikuliXJClass.Runtime.getRuntime()
+        total = int(runtime.totalMemory())
+        free = int(runtime.freeMemory())
+        stats = {'heapUsed': (total - free) / MB, 'heapCommitted': total / MB, 'heapMax': int(runtime.maxMemory()) / MB}
+
+        cached = SikuliXMemory._static_field(SikuliXJClass.Image, 'currentMemory')
+        stats['imageCacheUsed'] = None if cached == None else int(cached) / MB
+        limit = SikuliXMemory._static_field(SikuliXJClass.Settings, 'ImageCache')
+        stats['imageCacheMax'] = None if limit == None else int(limit)
+        images = SikuliXMemory._static_field(SikuliXJClass.Image, 'images')
+        stats['imageCacheCount'] = None if images == None else int(images.size())
+        return stats
+
+    @staticmethod
+    def set_cache_limit(mb):
+        # maximum size of the SikuliX image cache in MB, 0 disables caching; SikuliX evicts the oldest images
+        field = SikuliXSettings._settings_field('ImageCache')
+        previous = int(field.get(None))
+        SikuliXSettings._settings_setField(field, int(mb))
+        return previous
+
+    @staticmethod
+    def cleanup():
+        # drop all cached images of SikuliX, then let the JVM collect the released buffers
+        SikuliXJClass.Image.purge()
+        SikuliXJClass.System.gc()
+
+    def running(self):
+        return self.thread != None and self.thread.is_alive()
+
+    def start(self, interval=60):
+        self.stop()
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self._run, args=(float(interval),), name='SikuliXMemory', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.running():
+            self.stopEvent.set()
+            self.thread.join()
+        self.thread = None
+
+    def _run(self, interval):
+        attach_background_thread()
+        while not self.stopEvent.is_set():
+            try:
+                self.timing.sample('memory', SikuliXMemory.stats())
+            except Exception as e:
+                libLogger.error('Memory sampling failed: %s' % e)
+            self.stopEvent.wait(interval)
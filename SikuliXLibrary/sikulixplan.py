@@ -0,0 +1,54 @@
+# MIT license
+
+
+class SikuliXActionStep():
+    '''
+        One step of an action plan, see Region RunActions. A step is given as dictionary, as list or tuple, or as
+        string with the fields separated by |, in the order: action, target, dx, dy, text. Empty fields use the
+        defaults. For dragDrop, target2, dx2 and dy2 follow; for wait, the target is the number of seconds.
+    '''
+    actions = ('click', 'doubleClick', 'rightClick', 'hover', 'type', 'typeKeys', 'paste', 'dragDrop', 'wait')
+
+    def __init__(self, action, target=None, dx=0, dy=0, text=None, target2=None, dx2=0, dy2=0):
+        if action not in SikuliXActionStep.actions:
+            raise Exception('Unsupported action: {}'.format(action))
+        if action in ('type', 'typeKeys', 'paste') and text == None:
+            raise Exception('Action {} needs a text'.format(action))
+        if action in ('click', 'doubleClick', 'rightClick', 'hover', 'dragDrop') and target == None:
+            raise Exception('Action {} needs a target'.format(action))
+        if action == 'dragDrop' and target2 == None:
+            raise Exception('Action dragDrop needs target2')
+        self.action = action
+        self.target = target
+        self.dx = int(dx or 0)
+        self.dy = int(dy or 0)
+        self.text = text
+        self.target2 = target2
+        self.dx2 = int(dx2 or 0)
+        self.dy2 = int(dy2 or 0)
+        # patterns prepared once, matches located in the latest capture and the digest of the matched pixels
+        self.patterns = []
+        self.matches = []
+        self.digests = []
+
+    @staticmethod
+    def parse(step):
+        if isinstance(step, SikuliXActionStep):
+            return step
+        if isinstance(step, dict):
+            return SikuliXActionStep(**step)
+        if isinstance(step, str):
+            # the text is kept as it is, with leading and trailing spaces; a text with | needs a list or dictionary
+            step = [field if i == 4 else field.strip() for i, field in enumerate(step.split('|'))]
+        return SikuliXActionStep(*[None if field == '' else field for field in step])
+
+    def targets(self):
+        # (image, dx, dy) of the targets to locate before the action
+        if self.action == 'wait' or self.target == None:
+            return []
+        if self.action == 'dragDrop':
+            return [(self.target, self.dx, self.dy), (self.target2, self.dx2, self.dy2)]
+        return [(self.target, self.dx, self.dy)]
+
+    def __str__(self):
+        return '{} {}'.format(self.action, self.target or '')
@@ -2,6 +2,16 @@
 
 from .sikulixjclass import *
 from .sikulixlogger import *
+from .sikulixcapture import *
+from .sikulixtextindex import *
+from .sikulixcontext import *
+from .sikulixhostlock import *
+from .sikulixkeys import *
+from .sikulixxtest import *
+from .sikulixplan import *
+from .sikulixhighlight import *
+from contextlib import contextmanager
+import threading, time
 
 if not useJpype:
     from .sikulixpy4j import *
@@ -10,24 +20,84 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
     '''
         SikuliX Region class and all interactions with the region
     '''
-    @not_keyword
-    def __init__(self, logImages=True, centerMode=False):
-        SikuliXLogger.__init__(self, logImages)
+    # mouse and keyboard are shared by all threads, so input actions are done one at a time
+    inputLock = threading.RLock()
+    # seconds between captures while waiting for a screen change
+    changeScanInterval = 0.05
+    # seconds the bounds of an application window are used without asking the system again
+    appWindowRefresh = 2.0
+
+    # state of the current thread or asyncio task, see SikuliXContext
+    appRegion = SikuliXContext.field('region')
+    appPattern = SikuliXContext.field('pattern')
+    appMatch = SikuliXContext.field('match')
+    userDefined = SikuliXContext.field('userDefined')
+    textIndex = SikuliXContext.field('textIndex')
+    searchedFrame = SikuliXContext.field('searchedFrame')
 
+    @not_keyword
+    def __init__(self, logImages=True, centerMode=False, logImageOptions=None, logImageRetention=None,
+                 hostInputLock=False):
         self.appScreen = SikuliXJClass.Screen()
         br = self.appScreen.getBottomRight()
         appCoordinates = (0, 0, br.x, br.y)
         self.appScreen = SikuliXJClass.Screen()
-        self.appRegion = SikuliXJClass.Region(*appCoordinates)
-        self.userDefined = appCoordinates
-        self.appPattern = SikuliXJClass.Pattern()
-        self.appMatch = SikuliXJClass.Match()
+        # context of the thread creating the library, other threads and tasks start from a copy of it
+        self.mainContext = SikuliXContext(SikuliXJClass.Region(*appCoordinates), appCoordinates)
+
+        SikuliXLogger.__init__(self, logImages, logImageOptions, logImageRetention)
+        # named regions defined with Region Define
+        self.namedRegions = {}
+        # XTest input provider, see Set InputProvider
+        self.xtestInput = None
+        # lock of mouse and keyboard input shared with other processes, see Set HostInputLock
+        self.hostInputLock = None
+        # blocking or asynchronous highlights, see Set HighlightMode
+        self.highlighter = SikuliXHighlighter()
+        # cached window bounds (rect, time) by application name, for the AppWindow select mode
+        self.appWindows = {}
+        if hostInputLock:
+            self.set_hostInputLock(True, None if hostInputLock in (True, 'True', 'true') else hostInputLock)
         
         self.offsetCenterMode = centerMode
         self.defaultRegionSelectMode = None
         
         libLogger.debug('SikuliXRegion init')
         
+    @not_keyword
+    def _context(self):
+        return SikuliXContext.get(self, self.mainContext)
+
+    @not_keyword
+    def _region_snapshot(self):
+        region = self.appRegion
+        return {'rect': (int(region.x), int(region.y), int(region.w), int(region.h)), 'userDefined': self.userDefined,
+                'autoWait': float(region.getAutoWaitTimeout()), 'findFailedResponse': region.getFindFailedResponse(),
+                'offsetCenterMode': self.offsetCenterMode, 'defaultRegionSelectMode': self.defaultRegionSelectMode}
+
+    @not_keyword
+    def _region_restore(self, snapshot):
+        # the main context starts again from the snapshot; the contexts of all other threads and tasks are 
+        # dropped, and copied again from the main context at their next use
+        ctx = self.mainContext
+        ctx.region.setRect(*(JInt(v) for v in snapshot['rect']))
+        ctx.region.setAutoWaitTimeout(snapshot['autoWait'])
+        ctx.region.setFindFailedResponse(snapshot['findFailedResponse'])
+        ctx.userDefined = snapshot['userDefined']
+        ctx.pattern = SikuliXJClass.Pattern()
+        ctx.match = SikuliXJClass.Match()
+        ctx.textIndex = None
+        ctx.searchedFrame = None
+        ctx.regionName = None
+        SikuliXContext.reset(ctx)
+        self.offsetCenterMode = snapshot['offsetCenterMode']
+        self.defaultRegionSelectMode = snapshot['defaultRegionSelectMode']
+        self.namedRegions = {}
+        self.appWindows = {}
+        self.set_inputProvider('java')
+        self.highlighter.cancel()
+        self.highlighter = SikuliXHighlighter()
+
     # Region - Set operations
     @keyword
     def set_offsetCenterMode(self, mode):
@@ -48,31 +118,127 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         - `UserDefined` will use the values of the last `Region Set Rect` call
         - `FullScreen`  selects the entire screen
         - `LastMatch` uses the result of the previous search action
+        - `AppWindow` selects the window of the focused application, `AppWindow:name` the window of the named 
+        application (name or window title as for `App Focus`). The window bounds are cached and refreshed 
+        after a few seconds, or at once when a search in them fails because the window was moved
         - `None` uses the legacy way of selecting the active region
         
         The default selection can be overriden at every keyword call, by specifying the value for `regionSelect`
         
         | Region SetDefaultSelectMode | FullScreen |
+        | Region SetDefaultSelectMode | AppWindow:Leafpad |
         '''
         self.defaultRegionSelectMode = mode
         
     @keyword
-    def region_setAutoWait(self, seconds):
+    def set_inputProvider(self, provider='java', display=None):
+        '''
+        Select how mouse and keyboard input is done by `Region Click`, `Region DoubleClick`, `Region RightClick`, 
+        `Region Hover`, `Region DragDrop`, `Region Type`, `Region Paste` and `Region MouseMove`.
+        
+        | java | Default, input by SikuliX with java.awt.Robot, including the mouse move animation (``MoveMouseDelay``) |
+        | xtest | Linux (X11) only, input injected directly through the XTest extension of the X server, without \
+            animation and typing delays. Needs python-xlib (``pip install robotframework-sikulixlibrary[xtest]``). \
+            Text with SikuliX special keys or modifiers is still typed by SikuliX |
+        
+        display is the X display for xtest, by default DISPLAY environment variable. Returns the previous provider.
+        
+        | Set InputProvider | xtest |
+        | Set InputProvider | java |
+        '''
+        previous = 'java' if self.xtestInput == None else 'xtest'
+        if self.xtestInput != None:
+            self.xtestInput.close()
+            self.xtestInput = None
+        if provider == 'xtest':
+            self.xtestInput = SikuliXXTestInput(display)
+        elif provider != 'java':
+            raise Exception('Unsupported input provider: {}'.format(provider))
+        return previous
+
+    @keyword
+    def set_hostInputLock(self, mode, path=None, timeout=None):
+        '''
+        Enable or disable a lock of mouse and keyboard input shared by all processes on the host, e.g. by pabot 
+        workers using the same display. Only the input itself is done under the lock: the implicit find of an
+        action keyword, as well as all other searches, OCR and screenshots, still run concurrently.
+        The same lock can be enabled at library import with ``hostInputLock=True`` or ``hostInputLock=path``.
+        
+        | mode | True to enable, False to disable the lock |
+        | path | Lock file used by all processes, default is a file per DISPLAY in the temporary directory |
+        | timeout | Maximum seconds to wait for the lock, default is to wait until it is free |
+        
+        | Set HostInputLock | ${True} |
+        | Set HostInputLock | ${True} | /tmp/desktop1.lock | timeout=60 |
+        '''
+        if self.hostInputLock != None:
+            self.hostInputLock.close()
+            self.hostInputLock = None
+        if mode in (True, 'True', 'true'):
+            self.hostInputLock = SikuliXHostLock(path, timeout)
+            lazyLogger.debug('Host input lock: %s', self.hostInputLock.path)
+
+    @keyword
+    def set_highlightMode(self, mode='async', budget=None):
+        '''
+        Select how highlights are shown by `Region Highlight` with seconds, and limit the total highlight time.
+
+        | blocking | Default, the keyword waits until the highlight is switched off, as done by SikuliX |
+        | async | The highlight is switched on and removed by a background timer, the execution continues at once. \
+            If the SikuliX settings ``Highlight`` or ``ShowActions`` are on (see `Settings Set`), these are switched \
+            off and done by the library instead: every match found is highlighted for ``DefaultHighlightTime`` \
+            and the target of every mouse action for ``SlowMotionDelay`` seconds, both without blocking |
+
+        budget is the maximum highlight time in seconds per test, highlights beyond it are shortened or skipped.
+        Returns the previous mode.
+
+        | Set HighlightMode | async | budget=10 |
+        | Set HighlightMode | blocking |
+        '''
+        if mode not in ('blocking', 'async'):
+            raise Exception('Unsupported highlight mode: {}'.format(mode))
+        highlighter = self.highlighter
+        previous = highlighter.mode
+        if mode == 'async' and previous == 'blocking':
+            highlighter.highlightMatches = bool(highlighter.setting('Highlight'))
+            highlighter.showActions = bool(SikuliXJClass.Settings.isShowActions())
+            highlighter.setting('Highlight', False)
+            SikuliXJClass.Settings.setShowActions(False)
+        elif mode == 'blocking' and previous == 'async':
+            highlighter.cancel()
+            highlighter.setting('Highlight', highlighter.highlightMatches)
+            SikuliXJClass.Settings.setShowActions(highlighter.showActions)
+            highlighter.highlightMatches = highlighter.showActions = False
+        highlighter.mode = mode
+        highlighter.budget = None if budget == None else float(budget)
+        return previous
+
+    @not_keyword
+    def start_test(self, name, attrs):
+        # library listener method
+        SikuliXLogger.start_test(self, name, attrs)
+        self.highlighter.reset()
+
+    @keyword
+    def region_setAutoWait(self, seconds, region=None):
         '''
         Set the maximum waiting time for all subsequent find operations in that Region.
         
         | Region SetAutoWait | ${5} |
+        | Region SetAutoWait | ${2} | region=toolbar |
         '''
-        self.appRegion.setAutoWaitTimeout(float(seconds))
+        with self._use_region(region):
+            self.appRegion.setAutoWaitTimeout(float(seconds))
 
     @keyword
-    def region_getAutoWait(self):
+    def region_getAutoWait(self, region=None):
         '''
         Get the current value of the maximum waiting time for find operation in this region.
         
         | ${wait} | Region GetAutoWait |
         '''
-        return self.appRegion.getAutoWaitTimeout()
+        with self._use_region(region):
+            return self.appRegion.getAutoWaitTimeout()
 
     @keyword
     def region_setFindFailedResponse(self, val):
@@ -127,6 +293,14 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         ``Region SetRect w=800  h=600  dx=100  dy=100  mode=left-upper``  is equivalent of 
         ``Region SetRect  100  100  800  600`` 
         '''
+        x, y, w, h = self._rect_for_mode(x, y, w, h, dx, dy, mode)
+        self.appRegion.setRect(JInt(x), JInt(y), JInt(w), JInt(h))
+        self.userDefined = (int(x), int(y), int(w), int(h))
+        lazyLogger.trace('Region Set Rect %s  %s  %s  %s', x, y, w, h)
+        
+    @not_keyword
+    def _rect_for_mode(self, x, y, w, h, dx, dy, mode):
+        # position of a w x h rectangle, given directly or aligned to a corner or the center of the screen
         if mode == 'left-upper':
             x = dx
             y = dy
@@ -145,12 +319,67 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         elif mode == None:
             pass
         else:
-            logger.error('Unsupported mode: {}'.format(mode))    
-            
-        self.appRegion.setRect(JInt(x), JInt(y), JInt(w), JInt(h))
-        self.userDefined = (int(x), int(y), int(w), int(h))
-        logger.trace('Region Set Rect {}  {}  {}  {}'.format(x, y, w, h))
+            logger.error('Unsupported mode: {}'.format(mode))
+        return x, y, w, h
+
+    # Region - named regions
+    @keyword
+    def region_define(self, name, x=0, y=0, w=0, h=0, dx=0, dy=0, mode=None, autoWait=None):
+        '''
+        Define a named region, that is kept for the whole run and can be given with ``region=name`` to the find, 
+        text, OCR, highlight, mouse and keyboard keywords. The position and size are given in the same manner as 
+        for `Region SetRect`, e.g. relative to a corner of the screen. Each named region has its own auto wait 
+        timeout and last match, so that switching between e.g. a sidebar, a toolbar and the content pane does
+        not need a `Region SetRect` before each keyword. Defining a name again replaces the region.
+        
+        A named region is used as defined: ``onScreen`` and ``regionSelect`` arguments do not change it.
+        Named regions are shared by all threads, so the last match of a named region should be used only by the
+        thread that searched it.
+        
+        | Region Define | sidebar | w=300 | h=1080 | mode=left-upper |
+        | Region Define | toolbar | w=1920 | h=120 | mode=left-upper | autoWait=2 |
+        | Region Click | save.png | region=toolbar |
+        | ${match} | Region Find | item.png | region=sidebar |
+        | Region Click | useLastMatch=${True} | region=sidebar |
+        '''
+        x, y, w, h = self._rect_for_mode(x, y, w, h, dx, dy, mode)
+        region = SikuliXJClass.Region(JInt(x), JInt(y), JInt(w), JInt(h))
+        if autoWait != None:
+            region.setAutoWaitTimeout(float(autoWait))
+        self.namedRegions[name] = region
+        lazyLogger.trace('Region Define %s: %s  %s  %s  %s', name, x, y, w, h)
+        return region
+
+    @keyword
+    def region_undefine(self, name):
+        '''
+        Remove a region defined with `Region Define`.
         
+        | Region Undefine | sidebar |
+        '''
+        self._named_region(name)
+        del self.namedRegions[name]
+
+    @not_keyword
+    def _named_region(self, name):
+        if name not in self.namedRegions:
+            raise Exception('Region not defined: {}'.format(name))
+        return self.namedRegions[name]
+
+    @contextmanager
+    def _use_region(self, name):
+        # the named region replaces the active region of the current context for the duration of one keyword
+        if name == None:
+            yield
+            return
+        ctx = self._context()
+        saved = (ctx.region, ctx.regionName)
+        ctx.region, ctx.regionName = self._named_region(name), name
+        try:
+            yield
+        finally:
+            ctx.region, ctx.regionName = saved
+
     # Region - find operations
     @not_keyword
     def _prepare_pattern(self, target, dx=0, dy=0):
@@ -173,16 +402,16 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         else:
             img = target
 
-        logger.trace("Prepare pattern with image: %s" % img)
+        lazyLogger.trace("Prepare pattern with image: %s", img)
         pattern = SikuliXJClass.Pattern(img)
         if mask == '0':
-            logger.trace("Prepare pattern with mask: default black")
+            lazyLogger.trace("Prepare pattern with mask: default black")
             pattern.mask()
         elif mask != -1:
-            logger.trace("Prepare pattern with mask: %s" % mask)
+            lazyLogger.trace("Prepare pattern with mask: %s", mask)
             pattern.mask(mask)
         if sim != 0:
-            logger.trace("Prepare pattern with similarity: %s" % sim)
+            lazyLogger.trace("Prepare pattern with similarity: %s", sim)
             pattern.similar(sim)
 
         # if dx and dy are not given, no target offset is given and click is center of image
@@ -202,19 +431,76 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         if regionSelect == None:
             regionSelect = self.defaultRegionSelectMode
             
-        if regionSelect == 'UserDefined':
+        if self._context().regionName != None:
+            # named region given to the keyword is used as defined
+            pass
+        elif regionSelect == 'UserDefined':
             self.appRegion.setRect(SikuliXJClass.Region(*self.userDefined))
         elif regionSelect == 'LastMatch':
             self.appRegion.setRect(self.appRegion.getLastMatch())
         elif regionSelect == 'FullScreen':
             self.appRegion.setRect(self.appScreen)
+        elif SikuliXRegion._is_app_window(regionSelect):
+            self.appRegion.setRect(SikuliXJClass.Region(*self._app_window(regionSelect)))
         else:
             # lecacy modes
             if onScreen == True:
                 self.appRegion.setRect(self.appScreen)
                 
-        logger.info('Active area {} {}, {}x{}'.format(self.appRegion.x, self.appRegion.y, self.appRegion.w, self.appRegion.h))
+        # Java fields are read only if the message is logged
+        lazyLogger.info(lambda: 'Active area {} {}, {}x{}'.format(self.appRegion.x, self.appRegion.y, self.appRegion.w, self.appRegion.h))
                
+    @staticmethod
+    def _is_app_window(mode):
+        return mode == 'AppWindow' or (mode != None and mode.startswith('AppWindow:'))
+
+    @not_keyword
+    def _app_window(self, mode, refresh=False):
+        # bounds of the focused window (AppWindow) or of the window of a named application (AppWindow:name), 
+        # kept for appWindowRefresh seconds since asking the system for windows is slow
+        name = mode.partition(':')[2] or None
+        cached = self.appWindows.get(name)
+        if cached != None and not refresh and time.time() - cached[1] < SikuliXRegion.appWindowRefresh:
+            return cached[0]
+        if name == None:
+            window = SikuliXJClass.App.focusedWindow()
+        else:
+            # same App handle as used by App Open and App Focus
+            window = self._app(name).window()
+        if window == None:
+            raise Exception('No window found for application: {}'.format(name or 'focused'))
+        rect = (int(window.x), int(window.y), int(window.w), int(window.h))
+        self.appWindows[name] = (rect, time.time())
+        return rect
+
+    @not_keyword
+    def _app_window_moved(self, regionSelect):
+        # refresh the cached window bounds, True if the active region was changed to the new bounds
+        if regionSelect == None:
+            regionSelect = self.defaultRegionSelectMode
+        if not SikuliXRegion._is_app_window(regionSelect) or self._context().regionName != None:
+            return False
+        old = self.appWindows.get(regionSelect.partition(':')[2] or None)
+        try:
+            rect = self._app_window(regionSelect, True)
+        except Exception:
+            # window closed meanwhile, the search result stays as it is
+            return False
+        if old != None and old[0] == rect:
+            return False
+        lazyLogger.debug('Application window moved to %s', rect)
+        self.appRegion.setRect(SikuliXJClass.Region(*rect))
+        return True
+
+    @not_keyword
+    def _region_findRetry(self, type, seconds, start):
+        # search again after the window moved, waiting only for the time left of the timeout of the first search
+        if type == 'find':
+            return self._region_findCall(type, 0)
+        left = self._wait_time(seconds) - (time.time() - start)
+        # at least one more search is done, a timeout of 0 would wait for the auto wait timeout again
+        return self._region_findCall(type, max(left, 0.01))
+
     @not_keyword
     def _prepare_lastMatch(self, dx, dy):
         # calculate offset relative to upper left corner.
@@ -230,49 +516,73 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
 
         self.appMatch.setTargetOffset(JInt(dx), JInt(dy))
 
+    @not_keyword
+    def _region_findCall(self, type, seconds):
+        if seconds == 0:
+            lazyLogger.trace("Call findOperation with arguments: %s", type)
+            lazyLogger.trace('Region: %s; Pattern: %s', self.appRegion, self.appPattern)
+            if useJpype:
+                return SikuliXJClass.Region.class_.getDeclaredMethod(type, JObject).invoke(self.appRegion, self.appPattern)
+            else:
+                #print(self.appRegion)
+                #print(get_java_class(SikuliXJClass.Region))
+                #print(get_method(self.appRegion, type))
+                return get_method(self.appRegion, type)(self.appPattern)
+        else:
+            lazyLogger.trace("Call findOperation with arguments: %s, %s seconds", type, seconds)
+            lazyLogger.trace('Region: %s; Pattern: %s', self.appRegion, self.appPattern)
+            if useJpype:
+                return SikuliXJClass.Region.class_.getDeclaredMethod(type, JObject, JDouble).invoke(self.appRegion, 
+                                                                        self.appPattern, JDouble(seconds))
+            else:
+                return get_method(self.appRegion, type)(self.appPattern, JDouble(seconds))
+
     @not_keyword
     def _region_findOperation(self, type, target, seconds, onScreen, regionSelect):
-        logger.trace('{} on target ()'.format(type, target))
+        lazyLogger.trace('%s on target %s', type, target)
  
-        self._set_active_region(onScreen, regionSelect)
+        with self.timing.phase('bridge'):
+            self._set_active_region(onScreen, regionSelect)
         
-        self.appPattern = self._prepare_pattern(target)
+            self.appPattern = self._prepare_pattern(target)
         try:
-            if seconds == 0:
-                logger.trace("Call findOperation with arguments: %s" % type)
-                logger.trace('Region: ' + str(self.appRegion) + '; Pattern: ' + str(self.appPattern))
-                if useJpype:
-                    res = SikuliXJClass.Region.class_.getDeclaredMethod(type, JObject).invoke(self.appRegion, self.appPattern)
-                else:
-                    #print(self.appRegion)
-                    #print(get_java_class(SikuliXJClass.Region))
-                    #print(get_method(self.appRegion, type))
-                    res = get_method(self.appRegion, type)(self.appPattern)
-            else:
-                logger.trace("Call findOperation with arguments: %s, %s seconds" % (type, seconds))
-                logger.trace('Region: ' + str(self.appRegion) + '; Pattern: ' + str(self.appPattern))
-                if useJpype:
-                    res = SikuliXJClass.Region.class_.getDeclaredMethod(type, JObject, JDouble).invoke(self.appRegion, 
-                                                                            self.appPattern, JDouble(seconds))
+            with self.timing.phase('match'):
+                start = time.time()
+                try:
+                    res = self._region_findCall(type, seconds)
+                except:
+                    # the search failed in cached application window bounds, retried if the window moved
+                    if not self._app_window_moved(regionSelect):
+                        raise
+                    res = self._region_findRetry(type, seconds, start)
                 else:
-                    res = get_method(self.appRegion, type)(self.appPattern, JDouble(seconds))
+                    if not res and type != 'waitVanish' and self._app_window_moved(regionSelect):
+                        res = self._region_findRetry(type, seconds, start)
 
         except: # except should happen only for find or wait
+            self.searchedFrame = SikuliXFrame.last_searched(self.appRegion)
             self._failed("Image not visible on screen: " + target, seconds)
             raise Exception("_Find text method Failed")
 
+        # the frame that was searched is logged, instead of capturing again
+        frame = SikuliXFrame.last_searched(self.appRegion)
         if res:
             if type == 'waitVanish':
                 logger.info('PASS: ' + 'Image vanished from screen')
             else:
+                if self.highlighter.highlightMatches:
+                    self.highlighter.show(self.appRegion.getLastMatch(), self.highlighter.setting('DefaultHighlightTime'))
+                self.searchedFrame = frame
                 self._passed("Image visible on screen")
         else:
+            self.searchedFrame = frame
             self._notfound("Image not visible on screen: " + target, seconds)
 
         return res
             
     @keyword
-    def region_find(self, target, onScreen=True, regionSelect=None):
+    @timed('target')
+    def region_find(self, target, onScreen=True, regionSelect=None, region=None):
         '''
         Find a particular pattern, which is the given image. It searches within the region and returns the best match, 
         that shows a similarity greater than the minimum similarity given by the pattern. If no similarity was set for 
@@ -287,6 +597,7 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
             - onScreen - reset the region to the whole screen, otherwise will search on a region defined previously \
                 with set parameters keywords
             e.g. `Region Set Rect` where the parameters can be from a previous match or known dimensions, etc.
+            - region - name of a region defined with `Region Define`, searched instead of the active region
         
         `Region Find` does not wait for the appearance until timeout expires and throws `FindFailed` if not found.
            
@@ -299,12 +610,15 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         
         | Region Find | image.png=0.7 | 
         | Region Find | image | onScreen=${False} |
+        | Region Find | image | region=sidebar |
         
         '''
-        return self._region_findOperation('find', target, 0, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findOperation('find', target, 0, onScreen, regionSelect)
 
     @keyword
-    def region_wait(self, target, seconds=0, onScreen=True, regionSelect=None):
+    @timed('target')
+    def region_wait(self, target, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Wait until the particular pattern, which is the given image appears in the current region. See `Region Find`
         for more details.
@@ -318,10 +632,12 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         | Region Wait | image | onScreen=${False} |
         
         '''
-        return self._region_findOperation('wait', target, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findOperation('wait', target, seconds, onScreen, regionSelect)
 
     @keyword
-    def region_waitVanish(self, target, seconds=0, onScreen=True, regionSelect=None):
+    @timed('target')
+    def region_waitVanish(self, target, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Wait until the particular pattern, which is the given image vanishes the current screen. See `Region Find` 
         for more details.
@@ -330,10 +646,12 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
 
         | Region WaitVanish | image | 10s |
         '''
-        return self._region_findOperation('waitVanish', target, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findOperation('waitVanish', target, seconds, onScreen, regionSelect)
 
     @keyword
-    def region_exists(self, target, seconds=0, onScreen=True, regionSelect=None):
+    @timed('target')
+    def region_exists(self, target, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Wait until the particular pattern, which is the given image appears in the current region. See `Region Find` 
         for more details.
@@ -346,53 +664,190 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         | Region Exists | image | onScreen=${False} |
         
         '''
-        return self._region_findOperation('exists', target, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findOperation('exists', target, seconds, onScreen, regionSelect)
 
     @keyword
-    def region_has(self, target, seconds=0, onScreen=True, regionSelect=None):
+    @timed('target')
+    def region_has(self, target, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Similar with `Region Exists` as convenience wrapper intended to be used in logical expressions.
         '''
-        return self._region_findOperation('has', target, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findOperation('has', target, seconds, onScreen, regionSelect)
+
+    @keyword
+    @timed()
+    def region_waitStable(self, seconds=0.5, timeout=10, rate=10, threshold=0.001, onScreen=True, regionSelect=None,
+                          region=None):
+        '''
+        Wait until the active region stops changing, e.g. after animations or progressive rendering, so that a
+        following find does not match a half drawn screen. The region is sampled rate times per second, and the
+        keyword returns once consecutive samples differ in no more than threshold (share of pixels, 0.001 for 0.1%)
+        during the given seconds. Fails if the region is not stable within timeout seconds.
+
+        The samples are small grayscale copies of the region, compared with numpy if installed, so the CPU
+        cost is low also for the whole screen. The region is selected as for `Region Find`.
+        Returns the seconds waited.
+
+        | Region WaitStable |
+        | Region WaitStable | 1 | timeout=20 | regionSelect=UserDefined |
+        | Region WaitStable | 0.3 | rate=20 | region=dialog |
+        '''
+        with self._use_region(region):
+            self._set_active_region(onScreen, regionSelect)
+            rect = (int(self.appRegion.x), int(self.appRegion.y), int(self.appRegion.w), int(self.appRegion.h))
+            interval = 1.0 / float(rate)
+            start = stableSince = time.time()
+            with self.timing.phase('capture'):
+                last = SikuliXFrame.capture(self.appScreen, rect).thumbnail()
+            while True:
+                time.sleep(interval)
+                with self.timing.phase('capture'):
+                    frame = SikuliXFrame.capture(self.appScreen, rect)
+                    sample = frame.thumbnail()
+                now = time.time()
+                if SikuliXFrame.difference(last, sample) > float(threshold):
+                    stableSince = now
+                last = sample
+                if now - stableSince >= float(seconds):
+                    logger.info('PASS: Region stable after {:.2f} seconds'.format(now - start))
+                    return now - start
+                if now - start >= float(timeout):
+                    self.searchedFrame = frame
+                    self._failed('Region not stable within {} seconds'.format(timeout), timeout, mode='stable')
 
     # Region - mouse actions
+    @not_keyword
+    def _region_find_target(self, pattern):
+        # implicit find of an action, done before taking the input lock so that other threads and processes can
+        # use mouse and keyboard meanwhile; waits up to the auto wait timeout of the region, as the SikuliX action
+        # itself does, and the match keeps the target offset of the pattern
+        with self.timing.phase('match'):
+            if useJpype:
+                return SikuliXJClass.Region.class_.getDeclaredMethod('wait', JObject).invoke(self.appRegion, pattern)
+            else:
+                return get_method(self.appRegion, 'wait')(pattern)
+
+    @contextmanager
+    def _input_lock(self):
+        # mouse and keyboard input of all threads, and with a host input lock of all processes, one at a time
+        with self.timing.phase('lock'):
+            SikuliXRegion.inputLock.acquire()
+            try:
+                if self.hostInputLock != None:
+                    self.hostInputLock.acquire()
+            except:
+                SikuliXRegion.inputLock.release()
+                raise
+        try:
+            with self.timing.phase('action'):
+                yield
+        finally:
+            if self.hostInputLock != None:
+                self.hostInputLock.release()
+            SikuliXRegion.inputLock.release()
+
+    @not_keyword
+    def _show_action(self, match):
+        # ShowActions of SikuliX, done without blocking in async highlight mode
+        if self.highlighter.showActions:
+            self.highlighter.show(match, self.highlighter.setting('SlowMotionDelay'))
+
+    @not_keyword
+    def _xtest_action(self, action, match):
+        # same click point as SikuliX: the target of the match, with the offset of the pattern
+        location = match.getTarget()
+        self.xtestInput.action(action, location.x, location.y)
+        return 1
+
+    @not_keyword
+    def _match_action(self, action, match):
+        # mouse action on a match already found, by xtest or by SikuliX, shown if ShowActions is set
+        self._show_action(match)
+        if self.xtestInput != None:
+            return self._xtest_action(action, match)
+        if useJpype:
+            return SikuliXJClass.Region.class_.getDeclaredMethod(action, JObject).invoke(self.appRegion, match)
+        return get_method(self.appRegion, action)(match)
+
+    @not_keyword
+    def _xtest_default_action(self, action):
+        # same point as SikuliX for an action without target: the last match of the region, otherwise its center
+        match = self.appRegion.getLastMatch()
+        location = match.getTarget() if match != None else self.appRegion.getCenter()
+        self.xtestInput.action(action, location.x, location.y)
+        return 1
+
+    @not_keyword
+    def _drag_drop(self, match1, match2):
+        if self.xtestInput != None:
+            location1, location2 = match1.getTarget(), match2.getTarget()
+            self.xtestInput.drag_drop(location1.x, location1.y, location2.x, location2.y)
+            return 1
+        #return SikuliXJClass.Region.class_.getDeclaredMethod("dragDrop", JObject, JObject).invoke(self.appRegion, match1, match2) 
+        return self.appRegion.dragDrop(match1, match2)
+
+    @not_keyword
+    def _xtest_paste(self, text):
+        SikuliXJClass.App.setClipboard(text)
+        self.xtestInput.paste()
+        return 1
+
+    @not_keyword
+    def _xtest_can_type(self, key, modifier):
+        # special keys of SikuliX Key and modifiers are typed by SikuliX
+        return self.xtestInput != None and modifier == None and isinstance(key, str) and self.xtestInput.can_type(key)
+
     @not_keyword
     def _region_mouseAction(self, action='click', target=None, dx=0, dy=0, useLastMatch=False):
-        logger.trace('{} on target {} with offsets {},{}'.format(action, target, dx, dy))
+        lazyLogger.trace('%s on target %s with offsets %s,%s', action, target, dx, dy)
         
         # 1st case, target none - click on default
         if target == None:
-            logger.trace('Region ' + str(self.appRegion))
-            if useJpype:
-                return SikuliXJClass.Region.class_.getDeclaredMethod(action).invoke(self.appRegion)
-            else:
-                return get_method(self.appRegion, action)()
+            lazyLogger.trace('Region %s', self.appRegion)
+            with self._input_lock():
+                if self.xtestInput != None:
+                    return self._xtest_default_action(action)
+                if useJpype:
+                    return SikuliXJClass.Region.class_.getDeclaredMethod(action).invoke(self.appRegion)
+                else:
+                    return get_method(self.appRegion, action)()
             #return self.appRegion.click()
 
         # 2nd case, define a Pattern from image name - implicit find operation is processed first. 
         if not useLastMatch:
             self._set_active_region(None, None)
             pattern = self._prepare_pattern(target, JInt(dx), JInt(dy))
-            logger.trace('Region ' + str(self.appRegion) + '; Pattern ' + str(pattern))
-            if useJpype:
-                return SikuliXJClass.Region.class_.getDeclaredMethod(action, JObject).invoke(self.appRegion, pattern) 
-            else:
-                return get_method(self.appRegion, action)(pattern)
+            lazyLogger.trace('Region %s; Pattern %s', self.appRegion, pattern)
+            match = self._region_find_target(pattern)
+            self._show_action(match)
+            with self._input_lock():
+                if self.xtestInput != None:
+                    return self._xtest_action(action, match)
+                if useJpype:
+                    return SikuliXJClass.Region.class_.getDeclaredMethod(action, JObject).invoke(self.appRegion, match) 
+                else:
+                    return get_method(self.appRegion, action)(match)
 
         # 3rd case, match can be given only as lastMatch. Target offset can be null or specified.
         if useLastMatch:
             self._prepare_lastMatch(JInt(dx), JInt(dy))
-            logger.trace('Region ' + str(self.appRegion) + '; Match ' + str(self.appMatch))
-            if useJpype:
-                return SikuliXJClass.Region.class_.getDeclaredMethod(action, JObject).invoke(self.appRegion, self.appMatch)
-            else:
-                return get_method(self.appRegion, action)(self.appMatch)
+            lazyLogger.trace('Region %s; Match %s', self.appRegion, self.appMatch)
+            with self._input_lock():
+                if self.xtestInput != None:
+                    return self._xtest_action(action, self.appMatch)
+                if useJpype:
+                    return SikuliXJClass.Region.class_.getDeclaredMethod(action, JObject).invoke(self.appRegion, self.appMatch)
+                else:
+                    return get_method(self.appRegion, action)(self.appMatch)
 
         # 4th case, region - not implemented
         # 5th case, location - not implemented
 
     @keyword
-    def region_click(self, target=None, dx=0, dy=0, useLastMatch=False):
+    @timed('target')
+    def region_click(self, target=None, dx=0, dy=0, useLastMatch=False, region=None):
         '''
         Perform a mouse click on the click point using the left button.
         
@@ -405,6 +860,7 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
             - mask - an image with transparent or black parts or 0 for default masked black parts. Should be set as img:mask, img:0, img:mask=similarity or img:0=similarity
             - dx, dy - define click point, either relative to center or relative to upper left corner (default with `Set Offset Center Mode`)
             - useLastMatch - if True, will assume the LastMatch can be used otherwise SikuliX will do a find on the target image and click in the center of it.
+            - region - name of a region defined with `Region Define`, used instead of the active region
         If implicit find operation is needed, assume the region is the whole screen.
         
         Region Click with no arguments will either click the center of the last used Region or the lastMatch, if any is available.
@@ -413,35 +869,42 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         | Region Click | image.png=0.7 | ${dx} | ${dy} |
         | Region Click | image | dx | dy | useLastMatch=${True} |
         '''
-        return self._region_mouseAction('click', target, dx, dy, useLastMatch)
+        with self._use_region(region):
+            return self._region_mouseAction('click', target, dx, dy, useLastMatch)
 
     @keyword
-    def region_doubleClick(self, target=None, dx=0, dy=0, useLastMatch=False):
+    @timed('target')
+    def region_doubleClick(self, target=None, dx=0, dy=0, useLastMatch=False, region=None):
         '''
         Perform a mouse double-click on the click point using the left button. See `Region Click` for details.
 
         | Region DoubleClick | image | dx | dy |
         '''
-        return self._region_mouseAction('doubleClick', target, dx, dy, useLastMatch)
+        with self._use_region(region):
+            return self._region_mouseAction('doubleClick', target, dx, dy, useLastMatch)
 
     @keyword
-    def region_rightClick(self, target=None, dx=0, dy=0, useLastMatch=False):
+    @timed('target')
+    def region_rightClick(self, target=None, dx=0, dy=0, useLastMatch=False, region=None):
         '''
         Perform a mouse click on the click point using the right button. See `Region Click` for details.
 
         | Region RightClick | image | dx | dy |
         '''
-        return self._region_mouseAction('rightClick', target, dx, dy, useLastMatch)
+        with self._use_region(region):
+            return self._region_mouseAction('rightClick', target, dx, dy, useLastMatch)
 
     @keyword
-    def region_hover(self, target=None, dx=0, dy=0, useLastMatch=False):
+    @timed('target')
+    def region_hover(self, target=None, dx=0, dy=0, useLastMatch=False, region=None):
         '''
         Move the mouse cursor to hover above a click point defined by a target image and coordinates, 
         i.e. to display a tooltip. See `Region Click` for details.
 
         | Region Hover | image | dx | dy |
         '''
-        return self._region_mouseAction('hover', target, dx, dy, useLastMatch)
+        with self._use_region(region):
+            return self._region_mouseAction('hover', target, dx, dy, useLastMatch)
 
     @keyword
     def region_mouseMove(self, xoff, yoff):
@@ -451,34 +914,42 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         
         | Region MouseMove | x | y |
         '''
-        return self.appScreen.mouseMove(JInt(xoff), JInt(yoff))
+        with self._input_lock():
+            if self.xtestInput != None:
+                self.xtestInput.move_relative(xoff, yoff)
+                return 1
+            return self.appScreen.mouseMove(JInt(xoff), JInt(yoff))
     
     # Region - highlights operations
     @keyword
-    def region_highlight(self, seconds=0, useLastMatch=True):
+    def region_highlight(self, seconds=0, useLastMatch=True, region=None):
         '''
         Highlight toggle (switched on if off and vice versa) for the current region (defined with `Region Set Rect`) 
         or last match region. 
         
         For last match to be used, a last match operation needs to be performed first (e.g. find, wait, existsText and so on).
         
+        With seconds, the highlight is switched off after that time. Whether the keyword waits for it, and the
+        maximum highlight time per test, are set with `Set HighlightMode`.
+        
         | Region Highlight | 10 |
         '''
-        if useLastMatch:
-            self._prepare_lastMatch(0, 0)
-            if self.appMatch == None:
-                return 0
-            logger.trace(self.appMatch)
-            if seconds == 0:   
-                return self.appMatch.highlight()
-            else:
-                return self.appMatch.highlight(float(seconds))
-        else:
-            logger.trace(self.appRegion)
-            if seconds == 0:   
-                return self.appRegion.highlight()
+        with self._use_region(region):
+            if useLastMatch:
+                self._prepare_lastMatch(0, 0)
+                if self.appMatch == None:
+                    return 0
+                lazyLogger.trace('%s', self.appMatch)
+                if seconds == 0:   
+                    return self.appMatch.highlight()
+                else:
+                    return self.highlighter.show(self.appMatch, seconds)
             else:
-                return self.appRegion.highlight(float(seconds))
+                lazyLogger.trace('%s', self.appRegion)
+                if seconds == 0:   
+                    return self.appRegion.highlight()
+                else:
+                    return self.highlighter.show(self.appRegion, seconds)
 
     @keyword
     def region_highlightAllOff(self):
@@ -487,11 +958,13 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         
         | Region HighlightAllOff |
         '''
+        self.highlighter.cancel()
         return self.appScreen.highlightAllOff()
 
     # Region - keyboard operations
     @keyword
-    def region_paste(self, text, target=None, dx=0, dy=0):
+    @timed('target')
+    def region_paste(self, text, target=None, dx=0, dy=0, region=None):
         '''
         Paste the text at a click point defined by a target image and coordinates. See `Region Click` for more details.
         
@@ -511,17 +984,27 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         | Region Paste | text | image.png=0.7 | dx | dy |
         | Region Paste | text | dx | dy |
         '''
-        # 1st case, target none - click on default
-        if target == None:
-            return self.appScreen.paste(text)
+        with self._use_region(region):
+            # 1st case, target none - click on default
+            if target == None:
+                with self._input_lock():
+                    if self.xtestInput != None:
+                        return self._xtest_paste(text)
+                    return self.appScreen.paste(text)
 
-        # 2nd case, define a Pattern from image name - implicit find operation is processed first. 
-        pattern = self._prepare_pattern(target, dx, dy)
-        self.appRegion.setRect(self.appScreen)
-        return self.appRegion.paste(pattern, text)
+            # 2nd case, define a Pattern from image name - implicit find operation is processed first. 
+            pattern = self._prepare_pattern(target, dx, dy)
+            self._set_active_region(None, 'FullScreen')
+            match = self._region_find_target(pattern)
+            with self._input_lock():
+                if self.xtestInput != None:
+                    self._xtest_action('click', match)
+                    return self._xtest_paste(text)
+                return self.appRegion.paste(match, text)
 
     @keyword
-    def region_type(self, text, target=None, dx=0, dy=0, modifier=None):
+    @timed('target')
+    def region_type(self, text, target=None, dx=0, dy=0, modifier=None, region=None):
         '''
         Type the text at the current focused input field or at a click point specified by target image.
         
@@ -539,40 +1022,87 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
 
         | Region Type | text=A | modifier=SikuliXJClass.Key.CTRL |
         | Region Type | SikuliXJClass.Key.DELETE |
+        
+        To type text together with special keys, chords and pauses in one keyword, see `Region TypeKeys`.
 
         '''
         key = text
         mod = None        
 
+        # Key constants are resolved once and cached
         if "SikuliXJClass.Key" in text:
             s_key = text.split(".")[2]
             try:
-                #key = SikuliXJClass.Key.class_.getDeclaredField(s_key).get(None)
-                key = SikuliXJClass.Key().getClass().getDeclaredField(s_key).get(None)
+                key = SikuliXKeySequence.key(s_key)
             except:
                 key = s_key
         if modifier and "SikuliXJClass.Key" in modifier:
             s_key = modifier.split(".")[2]
-            #mod = SikuliXJClass.Key.class_.getDeclaredField(s_key).get(None)
-            mod = SikuliXJClass.Key().getClass().getDeclaredField(s_key).get(None)
+            mod = SikuliXKeySequence.key(s_key)
         
-        # 1st case, target none - click on default
-        if target == None:
-            if modifier == None:
-                return self.appScreen.type(key)
-            else:
-                return self.appScreen.type(key, mod)
+        with self._use_region(region):
+            # 1st case, target none - click on default
+            if target == None:
+                with self._input_lock():
+                    if self._xtest_can_type(key, modifier):
+                        self.xtestInput.type(key)
+                        return 1
+                    if modifier == None:
+                        return self.appScreen.type(key)
+                    else:
+                        return self.appScreen.type(key, mod)
 
-        # 2nd case, define a Pattern from image name - implicit find operation is processed first. 
-        pattern = self._prepare_pattern(target, dx, dy)
-        self.appRegion.setRect(self.appScreen)
-        if modifier == None:
-            return self.appRegion.type(pattern, key)
-        else:
-            return self.appRegion.type(pattern, key, mod)
+            # 2nd case, define a Pattern from image name - implicit find operation is processed first. 
+            pattern = self._prepare_pattern(target, dx, dy)
+            self._set_active_region(None, 'FullScreen')
+            match = self._region_find_target(pattern)
+            with self._input_lock():
+                if self._xtest_can_type(key, modifier):
+                    self._xtest_action('click', match)
+                    self.xtestInput.type(key)
+                    return 1
+                if modifier == None:
+                    return self.appRegion.type(match, key)
+                else:
+                    return self.appRegion.type(match, key, mod)
 
     @keyword
-    def region_dragDrop(self, target1, target2, dx1=0, dy1=0, dx2=0, dy2=0, useLastMatch=False):
+    @timed('target')
+    def region_typeKeys(self, keys, target=None, dx=0, dy=0, region=None):
+        '''
+        Type a whole key sequence: text, special keys, key chords and pauses, given in a compact syntax. The sequence
+        is compiled once and cached, and consecutive text and special keys are sent to SikuliX with a single type
+        call, so that a complete form can be filled in by one keyword.
+        
+        | text | typed as it is |
+        | {KEY} | special key, by name of a SikuliX Key constant, e.g. {ENTER}, {TAB}, {F5}, {PAGE_DOWN} |
+        | {KEY n} | key repeated n times, e.g. {BACKSPACE 5} |
+        | {MOD+KEY} | chord of modifiers CTRL, ALT, SHIFT, META, CMD, WIN or ALTGR with a key or character, e.g. {CTRL+A} |
+        | {WAIT seconds} | pause, e.g. {WAIT 0.5} |
+        | {{ and }} | literal braces |
+        
+        If target is given, the click point defined by target image and coordinates is clicked first, see 
+        `Region Click`. Otherwise the keys go to the current focused component.
+        
+        | Region TypeKeys | john{TAB}secret{ENTER} |
+        | Region TypeKeys | {CTRL+A}{DELETE}new value{TAB 2}{WAIT 0.5}{ENTER} | name_field.png | 50 | 10 |
+        '''
+        sequence = SikuliXKeySequence.compile(keys)
+        with self._use_region(region):
+            if target == None:
+                with self._input_lock():
+                    return sequence.run(self.appScreen)
+
+            pattern = self._prepare_pattern(target, dx, dy)
+            self._set_active_region(None, 'FullScreen')
+            match = self._region_find_target(pattern)
+            with self._input_lock():
+                self._match_action('click', match)
+                return sequence.run(self.appScreen)
+
+    @keyword
+    @timed('target1')
+    def region_dragDrop(self, target1, target2, dx1=0, dy1=0, dx2=0, dy2=0, useLastMatch=False, region=None):
         '''
         Perform a drag-and-drop operation from a starting click point to the target click point indicated 
         by the two target images respectively.
@@ -597,61 +1127,277 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
             
         | Region DragDrop | image1=0.7 | image2 | dx1 | dy1 | dx2 | dy2 |
         '''
-        # define a Pattern from second image name - implicit find operation is processed first. 
-        pattern2 = self._prepare_pattern(target2, dx2, dy2)
-        logger.trace(pattern2)
+        with self._use_region(region):
+            # define a Pattern from second image name - implicit find operation is processed first. 
+            pattern2 = self._prepare_pattern(target2, dx2, dy2)
+            lazyLogger.trace('%s', pattern2)
 
-        # match can be given only as lastMatch. Target offset can be null or specified.
-        if useLastMatch:
-            self._prepare_lastMatch(dx1, dy1)
-            self.appRegion.setRect(self.appScreen)
-            #return SikuliXJClass.Region.class_.getDeclaredMethod("dragDrop", JObject, JObject).invoke(self.appRegion, self.appMatch, pattern2)
-            self.appRegion.dragDrop(self.appMatch, pattern2)
-        # define a Pattern from first image name - implicit find operation is processed first. 
-        if not useLastMatch:
-            pattern1 = self._prepare_pattern(target1, dx1, dy1)
-            logger.trace(pattern1)
-            self.appRegion.setRect(self.appScreen)
-            #return SikuliXJClass.Region.class_.getDeclaredMethod("dragDrop", JObject, JObject).invoke(self.appRegion, pattern1, pattern2) 
-            self.appRegion.dragDrop(pattern1, pattern2)
+            # match can be given only as lastMatch. Target offset can be null or specified.
+            if useLastMatch:
+                self._prepare_lastMatch(dx1, dy1)
+                self._set_active_region(None, 'FullScreen')
+                match1 = self.appMatch
+            # define a Pattern from first image name - implicit find operation is processed first. 
+            if not useLastMatch:
+                pattern1 = self._prepare_pattern(target1, dx1, dy1)
+                lazyLogger.trace('%s', pattern1)
+                self._set_active_region(None, 'FullScreen')
+                match1 = self._region_find_target(pattern1)
+            match2 = self._region_find_target(pattern2)
+            with self._input_lock():
+                self._drag_drop(match1, match2)
+
+    # Region - actions with post-condition
+    @not_keyword
+    def _watch_snapshot(self, watchRegion):
+        # thumbnail of the watched area: a region defined with Region Define, or the active region
+        watched = self._named_region(watchRegion) if watchRegion != None else self.appRegion
+        rect = (int(watched.x), int(watched.y), int(watched.w), int(watched.h))
+        with self.timing.phase('capture'):
+            return rect, SikuliXFrame.capture(self.appScreen, rect).thumbnail()
+
+    @not_keyword
+    def _wait_change(self, rect, before, threshold, seconds):
+        # pixel differencing of thumbnails, much cheaper than a search; returns the seconds until the change
+        start = time.time()
+        while True:
+            with self.timing.phase('capture'):
+                after = SikuliXFrame.capture(self.appScreen, rect).thumbnail()
+            diff = SikuliXFrame.difference(before, after)
+            elapsed = time.time() - start
+            if diff > float(threshold):
+                logger.info('PASS: Screen changed ({:.1%} of pixels) after {:.2f} seconds'.format(diff, elapsed))
+                return elapsed
+            if elapsed >= float(seconds):
+                self.searchedFrame = None
+                self._failed('Screen did not change within {} seconds'.format(seconds), seconds, mode='change')
+            time.sleep(SikuliXRegion.changeScanInterval)
+
+    @keyword
+    @timed('target')
+    def region_clickAndWaitChange(self, target=None, dx=0, dy=0, watchRegion=None, threshold=0.01, seconds=5,
+                                  action='click', useLastMatch=False, region=None):
+        '''
+        Perform a mouse action and wait until the screen reacts. The watched area is captured before the action,
+        after it the keyword returns as soon as more than threshold (share of pixels, 0.01 for 1%) of the area
+        changed, or fails after the given seconds. Replaces fixed sleeps or waits for a follow-up image after an action.
+
+        Target and offsets are as for `Region Click`, action can be click, doubleClick, rightClick or hover.
+        watchRegion is the name of a region defined with `Region Define`, by default the active region is watched.
+        Small differences of single pixels, e.g. by anti-aliasing, are ignored.
+        Returns the seconds from the action until the change.
+
+        | Region ClickAndWaitChange | save_button.png |
+        | ${elapsed} | Region ClickAndWaitChange | menu.png | watchRegion=dialog | threshold=0.05 | seconds=10 |
+        | Region ClickAndWaitChange | item.png | action=doubleClick |
+        '''
+        if action not in ('click', 'doubleClick', 'rightClick', 'hover'):
+            raise Exception('Unsupported action: {}'.format(action))
+        with self._use_region(region):
+            rect, before = self._watch_snapshot(watchRegion)
+            self._region_mouseAction(action, target, dx, dy, useLastMatch)
+            return self._wait_change(rect, before, threshold, seconds)
+
+    @keyword
+    @timed('target')
+    def region_typeAndWaitChange(self, text, target=None, dx=0, dy=0, watchRegion=None, threshold=0.01, seconds=5,
+                                 region=None):
+        '''
+        Type a key sequence and wait until the screen reacts, e.g. to a final {ENTER}. The keys are given as for
+        `Region TypeKeys`, waiting for the change as described in `Region ClickAndWaitChange`.
+
+        | Region TypeAndWaitChange | search term{ENTER} | search_field.png | watchRegion=results |
+        | Region TypeAndWaitChange | {ENTER} |
+        '''
+        with self._use_region(region):
+            rect, before = self._watch_snapshot(watchRegion)
+            self.region_typeKeys(text, target, dx, dy)
+            return self._wait_change(rect, before, threshold, seconds)
+
+    # Region - action plans
+    @not_keyword
+    def _plan_capture(self):
+        # one capture of the active region, kept as ScreenImage for the Finder and as frame for comparisons
+        with self.timing.phase('capture'):
+            simg = self.appScreen.capture(self.appRegion)
+            frame = SikuliXFrame(simg.getImage(), simg.x, simg.y, simg.w, simg.h)
+        return simg, frame
+
+    @not_keyword
+    def _plan_locate(self, steps, simg, frame):
+        # all targets of the steps are searched in the same captured image, no new capture per target
+        finder = SikuliXJClass.Finder(simg, self.appRegion)
+        try:
+            with self.timing.phase('match'):
+                for step in steps:
+                    step.matches = []
+                    step.digests = []
+                    for pattern in step.patterns:
+                        finder.find(pattern)
+                        match = finder.next() if finder.hasNext() else None
+                        if match != None:
+                            match.setTargetOffset(pattern.getTargetOffset())
+                            # the matched area is hashed in place by Java, not copied out of the capture
+                            step.digests.append(frame.digest((match.x, match.y, match.w, match.h)))
+                        else:
+                            step.digests.append(None)
+                        step.matches.append(match)
+        finally:
+            finder.destroy()
+
+    @not_keyword
+    def _plan_changed(self, step):
+        # True if the pixels of a located target differ from the capture they were located in; only the target
+        # areas are captured again, not the whole region
+        for match, digest in zip(step.matches, step.digests):
+            if match == None:
+                continue
+            with self.timing.phase('capture'):
+                area = SikuliXFrame.capture(self.appScreen, (match.x, match.y, match.w, match.h))
+            if area.digest() != digest:
+                return True
+        return False
+
+    @not_keyword
+    def _plan_run(self, step):
+        lazyLogger.trace('Plan step %s', step)
+        # targets not visible in the capture, e.g. shown only by a previous step, are searched as usual
+        matches = [match if match != None else self._region_find_target(pattern)
+                   for pattern, match in zip(step.patterns, step.matches)]
+        match = matches[0] if matches else None
+
+        if step.action == 'wait':
+            time.sleep(float(step.target))
+            return
+        # mouse and keyboard are locked only for the input of the step, after its targets are found
+        with self._input_lock():
+            self._plan_input(step, matches)
+
+    @not_keyword
+    def _plan_input(self, step, matches):
+        match = matches[0] if matches else None
+        if step.action in ('click', 'doubleClick', 'rightClick', 'hover'):
+            self._match_action(step.action, match)
+        elif step.action == 'dragDrop':
+            self._drag_drop(matches[0], matches[1])
+        elif step.action == 'paste':
+            if match != None:
+                self._match_action('click', match)
+            if self.xtestInput != None:
+                self._xtest_paste(step.text)
+            else:
+                self.appScreen.paste(step.text)
+        elif step.action == 'typeKeys':
+            if match != None:
+                self._match_action('click', match)
+            SikuliXKeySequence.compile(step.text).run(self.appScreen)
+        else:
+            if match != None:
+                self._match_action('click', match)
+            if self._xtest_can_type(step.text, None):
+                self.xtestInput.type(step.text)
+            else:
+                self.appScreen.type(step.text)
+
+    @keyword
+    @timed()
+    def region_runActions(self, steps, reverify=True, onScreen=True, regionSelect=None, region=None):
+        '''
+        Run a list of actions as one plan: the targets of all steps are located in a single capture of the active
+        region, then the actions are done back to back, without an implicit find per action. A screen with many
+        actions costs one search pass instead of one per action.
+
+        Each step is given as string with the fields separated by |, or as list or dictionary, in the order:
+            - action - click, doubleClick, rightClick, hover, type, typeKeys, paste, dragDrop or wait
+            - target - image as described in `Region Click`; optional for type, typeKeys and paste, which then
+            go to the current focused component; number of seconds for wait
+            - dx, dy - click point, see `Region Click`
+            - text - text for type and paste, key sequence for typeKeys (see `Region TypeKeys`)
+            - target2, dx2, dy2 - drop point of dragDrop
+        Empty fields use the defaults.
+
+        With reverify, before each action only the area of its target is captured again and compared with the
+        capture it was located in. Only if these pixels changed, e.g. because a previous step opened a dialog, the
+        remaining targets are located again, in one new capture of the region. Without reverify, the located click
+        points are used as they are. A target not visible in the capture is searched before its action, waiting up
+        to the auto wait timeout.
+
+        As for the single action keywords, mouse and keyboard are locked only during the input of each step, see
+        concurrency in the library introduction. Returns the number of steps done.
+
+        | @{plan} | Create List | click|name_label.png|120|0 | type||||John |
+        | ... | typeKeys|||| {TAB}Smith{TAB} | dragDrop|file.png|||| folder.png |
+        | ... | wait|0.5 | click|ok_button.png |
+        | Region RunActions | ${plan} |
+        | Region RunActions | ${plan} | reverify=${False} | region=dialog |
+        '''
+        plan = [SikuliXActionStep.parse(step) for step in steps]
+        with self._use_region(region):
+            with self.timing.phase('bridge'):
+                self._set_active_region(onScreen, regionSelect)
+                for step in plan:
+                    step.patterns = [self._prepare_pattern(image, JInt(dx), JInt(dy)) for image, dx, dy in step.targets()]
+            simg, frame = self._plan_capture()
+            self._plan_locate(plan, simg, frame)
+            passes = 1
+
+            for i, step in enumerate(plan):
+                if reverify and i > 0 and self._plan_changed(step):
+                    simg, frame = self._plan_capture()
+                    self._plan_locate(plan[i:], simg, frame)
+                    passes += 1
+                try:
+                    self._plan_run(step)
+                except Exception as e:
+                    self.searchedFrame = None
+                    self._failed('Action plan failed at step {} ({}): {}'.format(i + 1, step, e), 0, mode='plan')
+            logger.info('PASS: Action plan of {} steps done with {} search passes'.format(len(plan), passes))
+        return len(plan)
 
     # Region - find text operations
     def _region_findTextOperation(self, type, text, seconds, onScreen, regionSelect):
         self._set_active_region(onScreen, regionSelect)
 
         try:
-            if seconds == 0:
-                logger.trace("Call findTextOperation with arguments: %s" % type)
-                logger.trace(self.appRegion)
-                if useJpype:
-                    res = SikuliXJClass.Region.class_.getDeclaredMethod(type, JString).invoke(self.appRegion, text)
+            with self.timing.phase('ocr'):
+                if seconds == 0:
+                    lazyLogger.trace("Call findTextOperation with arguments: %s", type)
+                    lazyLogger.trace('%s', self.appRegion)
+                    if useJpype:
+                        res = SikuliXJClass.Region.class_.getDeclaredMethod(type, JString).invoke(self.appRegion, text)
+                    else:
+                        res = get_method(self.appRegion, type)(text)
                 else:
-                    res = get_method(self.appRegion, type)(text)
-            else:
-                logger.trace("Call findTextOperation with arguments: %s, %s seconds" % (type, seconds))
-                logger.trace(self.appRegion)
-                if useJpype:
-                    res = SikuliXJClass.Region.class_.getDeclaredMethod(type, JString, JDouble).invoke(self.appRegion, 
-                                                                        text, JDouble(seconds))
-                else:
-                    res = get_method(self.appRegion, type)(text, JDouble(seconds))
+                    lazyLogger.trace("Call findTextOperation with arguments: %s, %s seconds", type, seconds)
+                    lazyLogger.trace('%s', self.appRegion)
+                    if useJpype:
+                        res = SikuliXJClass.Region.class_.getDeclaredMethod(type, JString, JDouble).invoke(self.appRegion, 
+                                                                            text, JDouble(seconds))
+                    else:
+                        res = get_method(self.appRegion, type)(text, JDouble(seconds))
 
         except: # except should happen only for find or wait
+            self.searchedFrame = SikuliXFrame.last_searched(self.appRegion)
             self._failed("Text not visible on screen: " + text, seconds, mode='text')
             raise Exception("_Find text method Failed")
 
+        # the frame that was searched is logged, instead of capturing again
+        frame = SikuliXFrame.last_searched(self.appRegion)
         if res:
             if type == 'waitVanish':
                 logger.info('PASS: ' + 'Text vanished from screen')
             else:
+                self.searchedFrame = frame
                 self._passed("Text visible on screen", mode='text')
         else:
+            self.searchedFrame = frame
             self._notfound("Text not visible on screen: " + text, seconds, mode='text')
 
         return res
 
     @keyword
-    def region_findText(self, text, onScreen=True, regionSelect=None):
+    @timed('text')
+    def region_findText(self, text, onScreen=True, regionSelect=None, region=None):
         '''
         Search for given text on screen or within current region. Does not repeat search and throws `FindFailed` if not found.
         
@@ -670,59 +1416,220 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         
         | Region FindText | text |
         '''
-        return self._region_findTextOperation('findText', text, 0, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findTextOperation('findText', text, 0, onScreen, regionSelect)
 
     @keyword
-    def region_waitText(self, text, seconds=0, onScreen=True, regionSelect=None):
+    @timed('text')
+    def region_waitText(self, text, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Wait for the given text to appear on screen or current region. Repeat search and throws if not found during the given
         timeout in seconds or as `Region SetAutoWait` previously.
         
         | Region WaitText | text | ${10} |
         '''
-        return self._region_findTextOperation('waitText', text, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findTextOperation('waitText', text, seconds, onScreen, regionSelect)
 
     @keyword
-    def region_waitVanishText(self, text, seconds=0, onScreen=True, regionSelect=None):
+    @timed('text')
+    def region_waitVanishText(self, text, seconds=0, onScreen=True, regionSelect=None, region=None):
         ''' 
         According to SikuliX documentation, not implemented yet.
         '''
-        return self._region_findTextOperation('waitVanishText', text, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findTextOperation('waitVanishText', text, seconds, onScreen, regionSelect)
 
     @keyword
-    def region_existsText(self, text, seconds=0, onScreen=True, regionSelect=None):
+    @timed('text')
+    def region_existsText(self, text, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Wait for the given text to appear on screen or current region. Repeat search and does not throws error 
         if not found during the given timeout in seconds or as `Region SetAutoWait` previously.
         
         | Region ExistsText | text | ${10} |
         '''
-        return self._region_findTextOperation('existsText', text, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findTextOperation('existsText', text, seconds, onScreen, regionSelect)
 
     @keyword
-    def region_hasText(self, text, seconds=0, onScreen=True, regionSelect=None):
+    @timed('text')
+    def region_hasText(self, text, seconds=0, onScreen=True, regionSelect=None, region=None):
         '''
         Search for given text on screen or within current region. Does not repeat search and does not throws 
         `FindFailed` if not found.
 
         | Region HasText | text |
         '''
-        return self._region_findTextOperation('hasText', text, seconds, onScreen, regionSelect)
+        with self._use_region(region):
+            return self._region_findTextOperation('hasText', text, seconds, onScreen, regionSelect)
+
+    # Region - OCR text index operations
+    @not_keyword
+    def _region_buildTextIndex(self, target=None, signature=None):
+        # target is the region read by OCR, by default the active region; signature is the digest of a frame
+        # of the target just captured, if any
+        if target == None:
+            target = self.appRegion
+        region = (int(target.x), int(target.y), int(target.w), int(target.h))
+        # signature is taken before OCR, so a change during OCR is detected by the next lookup
+        if signature == None:
+            with self.timing.phase('capture'):
+                signature = SikuliXFrame.capture(self.appScreen, region).digest()
+        with self.timing.phase('ocr'):
+            words = target.findWords()
+            lines = target.findLines()
+        index = SikuliXTextIndex.from_matches(words, lines, region, signature)
+        self.textIndex = index
+        lazyLogger.trace('Text index: %s words, %s lines', len(index.words), len(index.lines))
+        return index
+
+    @not_keyword
+    def _region_lookupIndexedText(self, text, mode, similar):
+        # local reference, the index may be released meanwhile by Clear ImageCache in another thread
+        index = self.textIndex
+        if index == None:
+            raise Exception('No text index available, use `Region IndexText` first')
+
+        # the index is valid as long as the indexed area shows the same frame; the digest is computed by Java,
+        # the pixels of the frame do not cross the bridge
+        region = index.region
+        with self.timing.phase('capture'):
+            frame = SikuliXFrame.capture(self.appScreen, region)
+            signature = frame.digest()
+        if signature != index.signature:
+            logger.info('Screen changed, rebuilding text index')
+            # the indexed area is read again, the active region is left as it is; the frame just captured is the
+            # one before OCR
+            index = self._region_buildTextIndex(SikuliXJClass.Region(*region), signature)
+
+        entry = index.lookup(text, mode, similar)
+        lazyLogger.trace('Indexed text lookup (%s): %s -> %s', mode, text, entry)
+        # the indexed frame is the evidence if the text is not found
+        return entry, frame
+
+    @keyword
+    @timed()
+    def region_indexText(self, onScreen=True, regionSelect=None, region=None):
+        '''
+        Read all text from screen or within current region with a single OCR pass, and keep the words and lines 
+        found together with their positions. Subsequent `Region FindIndexedText`, `Region ExistsIndexedText` and 
+        `Region ClickIndexedText` calls are resolved against this index instead of doing a new OCR pass each time.
+        
+        Before every lookup, the indexed area is captured again and compared with the indexed frame. If the screen
+        changed, the index is rebuilt automatically.
+        
+        Returns the number of words found.
+        
+        | Region IndexText |
+        | Region IndexText | onScreen=${False} |
+        '''
+        with self._use_region(region):
+            self._set_active_region(onScreen, regionSelect)
+            index = self._region_buildTextIndex()
+        return len(index.words)
+
+    @keyword
+    @timed('text')
+    def region_findIndexedText(self, text, mode='exact', similar=0.8):
+        '''
+        Search for the given text in the index built by `Region IndexText`. Throws if not found.
+        
+        The text is searched according to mode:
+            - exact - a word or a sequence of consecutive words within a line is equal with the text
+            - regex - the regular expression matches a word, otherwise a line
+            - fuzzy - the word or sequence of words within a line most similar with the text, with a similarity of at least `similar`
+        
+        Returns a SikuliX region covering the found text.
+        
+        | ${reg} | Region FindIndexedText | Save |
+        | ${reg} | Region FindIndexedText | Total: \\d+ | mode=regex |
+        | ${reg} | Region FindIndexedText | Sve as | mode=fuzzy | similar=0.7 |
+        '''
+        entry, frame = self._region_lookupIndexedText(text, mode, similar)
+        if entry == None:
+            self.searchedFrame = frame
+            self._failed("Text not found in index: " + text, 0, mode='text')
+        logger.info('PASS: Text found in index: ' + entry[0])
+        return SikuliXJClass.Region(*entry[1:])
+
+    @keyword
+    @timed('text')
+    def region_existsIndexedText(self, text, mode='exact', similar=0.8):
+        '''
+        Search for the given text in the index built by `Region IndexText`. Does not throw if not found.
+        See `Region FindIndexedText` for the search modes.
+        
+        Returns a SikuliX region covering the found text, or None.
+
+        | ${reg} | Region ExistsIndexedText | Cancel |
+        '''
+        entry, frame = self._region_lookupIndexedText(text, mode, similar)
+        if entry == None:
+            self.searchedFrame = frame
+            self._notfound("Text not found in index: " + text, 0, mode='text')
+            return None
+        logger.info('PASS: Text found in index: ' + entry[0])
+        return SikuliXJClass.Region(*entry[1:])
+
+    @keyword
+    @timed('text')
+    def region_clickIndexedText(self, text, dx=0, dy=0, mode='exact', similar=0.8):
+        '''
+        Click on the given text, found in the index built by `Region IndexText`. See `Region FindIndexedText` 
+        for the search modes.
+        
+        dx, dy - define click point, either relative to center or relative to upper left corner of the found text
+        (default with `Set Offset Center Mode`). With no offsets, the center of the text is clicked.
+
+        | Region ClickIndexedText | Save |
+        | Region ClickIndexedText | File | 5 | 5 |
+        '''
+        entry, frame = self._region_lookupIndexedText(text, mode, similar)
+        if entry == None:
+            self.searchedFrame = frame
+            self._failed("Text not found in index: " + text, 0, mode='text')
+        
+        _, x, y, w, h = entry
+        dx = int(dx)
+        dy = int(dy)
+        if dx == 0 and dy == 0:
+            x, y = x + w // 2, y + h // 2
+        elif self.offsetCenterMode:
+            x, y = x + w // 2 + dx, y + h // 2 + dy
+        else:
+            x, y = x + dx, y + dy
+        
+        lazyLogger.trace('Click indexed text %s at %s,%s', entry[0], x, y)
+        with self._input_lock():
+            return self.appScreen.click(SikuliXJClass.Location(JInt(x), JInt(y)))
+
+    @keyword
+    def region_clearTextIndex(self):
+        '''
+        Discard the index built by `Region IndexText`.
+        
+        | Region ClearTextIndex |
+        '''
+        self.textIndex = None
 
     # Region - read text by OCR operations
     @keyword
-    def region_getText(self, onScreen=True, regionSelect=None):
+    @timed()
+    def region_getText(self, onScreen=True, regionSelect=None, region=None):
         '''
         Captures text from screen or within current region. Returns that text.
         '''
-        self._set_active_region(onScreen, regionSelect)
-            
-        text = self.appRegion.text()
-        logger.trace('Text read: {}'.format(text))
+        with self._use_region(region):
+            self._set_active_region(onScreen, regionSelect)
+            with self.timing.phase('ocr'):
+                text = self.appRegion.text()
+        lazyLogger.trace('Text read: %s', text)
         return text
          
     # Region - read text by OCR operations
     @keyword
+    @timed('img')
     def region_text(self, img):
         '''
         Extract and return text from the given found image on screen (by using OCR)
@@ -731,17 +1638,19 @@ class SikuliXRegion(SikuliXJClass, SikuliXLogger):
         '''
         self.region_find(img)
         self.appMatch = self.appRegion.getLastMatch()
-        text = self.appMatch.text()
+        with self.timing.phase('ocr'):
+            text = self.appMatch.text()
         return str(text)
 
     @keyword
-    def region_screenshot(self, onScreen=True, regionSelect=None):
+    @timed()
+    def region_screenshot(self, onScreen=True, regionSelect=None, region=None):
         '''
         Take a screenshot of the specified region and add that to the log file.
         '''
-        self._set_active_region(onScreen, regionSelect)
-        region = (self.appRegion.x, self.appRegion.y, self.appRegion.w, self.appRegion.h)
-        name = self._screenshot("/matches/", region)
-        rel_path = relpath(name, SikuliXLogger.resultDir)
-        logger.info('Screenshot:   <img src="%s" />' % rel_path, True)
+        with self._use_region(region):
+            self._set_active_region(onScreen, regionSelect)
+            region = (self.appRegion.x, self.appRegion.y, self.appRegion.w, self.appRegion.h)
+            name = self._screenshot("/matches/", region)
+        logger.info(self._image_html('Screenshot:  ', name), True)
 
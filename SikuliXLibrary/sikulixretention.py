@@ -0,0 +1,123 @@
+# MIT license
+
+import collections, threading
+
+
+class SikuliXRetentionPolicy():
+    '''
+        Budget for the number and size of the images logged per test and per suite. When a budget is used up,
+        the strategy decides which images are kept:
+            - keep-first - further images are dropped
+            - keep-last - the oldest images are released to make room for the new ones: these are already
+              referenced in the log, so the writer replaces their content by a placeholder instead of deleting them
+            - sample - only the first and then every N-th image is kept, also without any limit, and until the
+              budget is used up if one is set
+        Without any limit set, keep-first and keep-last keep all images.
+        Byte sizes are known only after the background writer saved an image, so byte budgets may be
+        exceeded by the images still queued.
+    '''
+    strategies = ('keep-first', 'keep-last', 'sample')
+
+    def __init__(self):
+        self.settings = {'maxTestImages': 0, 'maxTestBytes': 0, 'maxSuiteImages': 0, 'maxSuiteBytes': 0,
+                         'strategy': 'keep-first', 'sampleEvery': 1, 'prunePassed': False}
+        self.lock = threading.Lock()
+        self.test = None
+        self.testScope = self._scope()
+        self.suiteScopes = [self._scope()]
+        self.sizes = {}
+        self.references = {}
+        self.status = {}
+        self.dropped = collections.Counter()
+        self.removed = collections.Counter()
+
+    @staticmethod
+    def _scope():
+        return {'seen': 0, 'images': collections.deque(), 'bytes': 0}
+
+    def _limits(self):
+        s = self.settings
+        return ((self.testScope, s['maxTestImages'], s['maxTestBytes']),
+                (self.suiteScopes[-1], s['maxSuiteImages'], s['maxSuiteBytes']))
+
+    @staticmethod
+    def _full(scope, maxImages, maxBytes):
+        return (maxImages > 0 and len(scope['images']) >= maxImages) or (maxBytes > 0 and scope['bytes'] >= maxBytes)
+
+    def _forget(self, path):
+        for scope in [self.testScope] + self.suiteScopes:
+            if path in scope['images']:
+                scope['images'].remove(path)
+                scope['bytes'] -= self.sizes.get(path, 0)
+
+    def admit(self, path):
+        '''
+        Decide if a new image can be written. Returns a (keep, evicted) tuple, where evicted are the paths
+        of older images that must be released to make room for it.
+        '''
+        with self.lock:
+            limits = self._limits()
+            for scope, _, _ in limits:
+                scope['seen'] += 1
+
+            strategy = self.settings['strategy']
+            if strategy == 'sample' and (self.testScope['seen'] - 1) % self.settings['sampleEvery'] != 0:
+                self.dropped[self.test] += 1
+                return False, []
+
+            evicted = []
+            if any(self._full(*limit) for limit in limits):
+                if strategy != 'keep-last':
+                    self.dropped[self.test] += 1
+                    return False, []
+                for scope, maxImages, maxBytes in limits:
+                    while scope['images'] and self._full(scope, maxImages, maxBytes):
+                        old = scope['images'][0]
+                        self._forget(old)
+                        evicted.append(old)
+                self.removed[self.test] += len(evicted)
+
+            for scope, _, _ in limits:
+                scope['images'].append(path)
+            return True, evicted
+
+    def account(self, path, size):
+        # called by the writer once the image is saved
+        with self.lock:
+            self.sizes[path] = size
+            for scope in [self.testScope] + self.suiteScopes:
+                if path in scope['images']:
+                    scope['bytes'] += size
+
+    def reference(self, path):
+        # image logged in the current test, candidate for pruning if all tests using it pass
+        with self.lock:
+            self.references.setdefault(path, set()).add(self.test)
+
+    def start_suite(self):
+        self.suiteScopes.append(self._scope())
+
+    def end_suite(self):
+        if len(self.suiteScopes) > 1:
+            self.suiteScopes.pop()
+
+    def start_test(self, name):
+        self.test = name
+        self.testScope = self._scope()
+
+    def end_test(self, name, status):
+        self.status[name] = status
+        self.test = None
+        self.testScope = self._scope()
+        return self.dropped[name], self.removed[name]
+
+    def prunable(self):
+        # images referenced only by passed tests
+        if not self.settings['prunePassed']:
+            return []
+        return [path for path, tests in self.references.items()
+                if all(self.status.get(test) == 'PASS' for test in tests)]
+
+    def report(self):
+        return {'dropped': sum(self.dropped.values()), 'removed': sum(self.removed.values()),
+                'tests': sorted(t for t in self.dropped + self.removed if t != None)}
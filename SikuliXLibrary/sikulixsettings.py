@@ -10,6 +10,8 @@ class SikuliXSettings(SikuliXJClass):
     '''
         SikuliX Settings class
     '''
+    simpleTypes = ('int', 'float', 'double', 'boolean', 'class java.lang.String')
+
     @keyword
     def settings_set(self, variable, value):
         '''
@@ -65,18 +67,29 @@ class SikuliXSettings(SikuliXJClass):
         | ${prev} | Settings Set | MinSimilarity | ${0.9} |
         | Settings Set | Highlight | ${True} |
         '''
+        target = SikuliXSettings._settings_field(variable)
+        previous = target.get(None)
+        self._settings_setField(target, value)
+        return previous
+
+    @staticmethod
+    def _settings_field(variable):
+        # public static field of Settings, also used by the highlighter and the memory helpers
         if useJpype:
-            target = SikuliXJClass.Settings.class_.getDeclaredField(variable)
+            return SikuliXJClass.Settings.class_.getDeclaredField(variable)
         else:
-            target = get_java_class(SikuliXJClass.Settings).getDeclaredField(variable)
+            return get_java_class(SikuliXJClass.Settings).getDeclaredField(variable)
 
-        previous = target.get(None)
-        variable_type = str(target.getGenericType())
-        logger.trace('Setting {}({}) to {}'.format(variable, variable_type, value))
+    @staticmethod
+    def _settings_setField(target, value, variable_type=None):
+        # variable_type is the generic type of the field, if already known
+        if variable_type == None:
+            variable_type = str(target.getGenericType())
+        lazyLogger.trace(lambda: 'Setting %s(%s) to %s' % (target.getName(), variable_type, value))
         if variable_type == 'int':
             target.set(None, JInt(value))
         elif variable_type == 'float':
-            target.set(value, JFloat(value))
+            target.set(None, JFloat(value))
         elif variable_type == 'double':
             target.set(None, JDouble(value))
         elif variable_type == 'boolean':
@@ -84,7 +97,29 @@ class SikuliXSettings(SikuliXJClass):
         else:
             target.set(None, value)
 
-        return previous
+    @not_keyword
+    def _settings_fields(self):
+        # (field, type) of the public static fields of Settings with a simple type, which can be saved and 
+        # restored by value
+        if useJpype:
+            fields = SikuliXJClass.Settings.class_.getDeclaredFields()
+        else:
+            fields = get_java_class(SikuliXJClass.Settings).getDeclaredFields()
+        # java.lang.reflect.Modifier PUBLIC, STATIC and FINAL
+        fields = [(f, str(f.getGenericType())) for f in fields if f.getModifiers() & 0x19 == 0x09]
+        return [(f, t) for f, t in fields if t in SikuliXSettings.simpleTypes]
+
+    @not_keyword
+    def _settings_snapshot(self):
+        return {str(f.getName()): f.get(None) for f, _ in self._settings_fields()}
+
+    @not_keyword
+    def _settings_restore(self, snapshot):
+        # only the settings changed since the snapshot are written
+        for f, variable_type in self._settings_fields():
+            name = str(f.getName())
+            if name in snapshot and f.get(None) != snapshot[name]:
+                self._settings_setField(f, snapshot[name], variable_type)
 
     @keyword
     def settings_get(self, variable):
@@ -94,11 +129,7 @@ class SikuliXSettings(SikuliXJClass):
 
         | ${val} | Settings Get | MinSimilarity |
         '''
-        if useJpype:
-            return SikuliXJClass.Settings.class_.getDeclaredField(variable).get(None)
-        else:
-            #return SikuliXJClass.Settings().getClass().getDeclaredField(variable).get(None)
-            return get_java_class(SikuliXJClass.Settings).getDeclaredField(variable).get(None)
+        return SikuliXSettings._settings_field(variable).get(None)
 
     @keyword
     def settings_setShowActions(self, mode):
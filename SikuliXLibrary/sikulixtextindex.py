@@ -0,0 +1,72 @@
+# MIT license
+
+import re
+from difflib import SequenceMatcher
+
+
+class SikuliXTextIndex():
+    '''
+        Words and lines read by a single OCR pass over a region, each with its bounding box on screen.
+        Entries are (text, x, y, w, h) tuples, kept in reading order (top left to bottom right).
+    '''
+    def __init__(self, words, lines, region, signature):
+        self.words = words
+        self.lines = lines
+        self.region = region
+        self.signature = signature
+
+    @staticmethod
+    def from_matches(words, lines, region, signature):
+        # words and lines are lists of SikuliX Match objects, as returned by Region.findWords() and findLines()
+        def entries(matches):
+            return [(str(m.getText()).strip(), int(m.x), int(m.y), int(m.w), int(m.h)) for m in list(matches)]
+        return SikuliXTextIndex(entries(words), entries(lines), region, signature)
+
+    @staticmethod
+    def _union(entries):
+        x = min(e[1] for e in entries)
+        y = min(e[2] for e in entries)
+        w = max(e[1] + e[3] for e in entries) - x
+        h = max(e[2] + e[4] for e in entries) - y
+        return (' '.join(e[0] for e in entries), x, y, w, h)
+
+    @staticmethod
+    def _same_line(word, following):
+        # the following word starts right of the word, with its vertical center within the height of the word
+        center = following[2] + following[4] / 2.0
+        return following[1] > word[1] and word[2] <= center <= word[2] + word[4]
+
+    def _phrases(self, count):
+        # all runs of count consecutive words within one line, merged into one entry
+        for i in range(len(self.words) - count + 1):
+            run = self.words[i:i + count]
+            if all(self._same_line(run[j], run[j + 1]) for j in range(count - 1)):
+                yield self._union(run)
+
+    def lookup(self, text, mode='exact', similar=0.8):
+        '''
+        Return the first entry matching text, or None. Modes:
+            - exact - the word, or the sequence of consecutive words within a line, equals the text
+            - regex - the regular expression matches a word, otherwise a whole line
+            - fuzzy - best word or word sequence within a line with a similarity ratio of at least similar (0.0...1.0)
+        '''
+        count = max(len(text.split()), 1)
+        if mode == 'exact':
+            for entry in self._phrases(count):
+                if entry[0] == text:
+                    return entry
+            return None
+        if mode == 'regex':
+            expr = re.compile(text)
+            for entry in self.words + self.lines:
+                if expr.search(entry[0]):
+                    return entry
+            return None
+        if mode == 'fuzzy':
+            best, score = None, 0.0
+            for entry in self._phrases(count):
+                ratio = SequenceMatcher(None, entry[0], text).ratio()
+                if ratio >= float(similar) and ratio > score:
+                    best, score = entry, ratio
+            return best
+        raise Exception('Unsupported text index mode: {}'.format(mode))
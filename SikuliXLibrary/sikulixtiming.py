@@ -0,0 +1,167 @@
+# MIT license
+
+import csv, functools, inspect, json, threading, time
+
+
+class _NoTiming():
+    # shared no-op context used while timing is disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Call():
+    def __init__(self, timing, keyword, image):
+        self.timing = timing
+        self.keyword = keyword
+        self.image = image
+
+    def __enter__(self):
+        state = self.timing.state()
+        self.outer = state.record != None
+        if not self.outer:
+            # nested library calls, e.g. region_text calling region_find, belong to the outer call
+            state.record = {'keyword': self.keyword, 'image': None if self.image == None else str(self.image),
+                            'start': time.time(), 'total': 0.0, 'phases': {}}
+            state.phases = []
+        return self
+
+    def __exit__(self, *exc):
+        if self.outer:
+            return False
+        state = self.timing.state()
+        record = state.record
+        record['total'] = time.time() - record['start']
+        record['status'] = 'FAIL' if exc[0] != None else 'PASS'
+        state.record = None
+        self.timing.add(record)
+        return False
+
+
+class _Phase():
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        state = self.timing.state()
+        if state.record != None:
+            # [name, start, time spent in nested phases]
+            state.phases.append([self.name, time.perf_counter(), 0.0])
+        return self
+
+    def __exit__(self, *exc):
+        state = self.timing.state()
+        if state.record == None or not state.phases:
+            return False
+        name, start, nested = state.phases.pop()
+        elapsed = time.perf_counter() - start
+        # phases are exclusive: time of nested phases is counted only for these
+        phases = state.record['phases']
+        phases[name] = phases.get(name, 0.0) + elapsed - nested
+        if state.phases:
+            state.phases[-1][2] += elapsed
+        return False
+
+
+class SikuliXTiming():
+    '''
+        Records for each keyword call the time spent in phases like bridge, match, ocr, action, capture, log and
+        queue. Time of a call not covered by a phase is reported as other. Records are kept in memory and exported
+        as JSON Lines or CSV.
+    '''
+    noTiming = _NoTiming()
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.exportPath = None
+        self.exportFormat = 'jsonl'
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def state(self):
+        if not hasattr(self.local, 'record'):
+            self.local.record = None
+            self.local.phases = []
+        return self.local
+
+    def call(self, keyword, image=None):
+        if not self.enabled:
+            return SikuliXTiming.noTiming
+        return _Call(self, keyword, image)
+
+    def phase(self, name):
+        if not self.enabled:
+            return SikuliXTiming.noTiming
+        return _Phase(self, name)
+
+    def add(self, record):
+        record['phases']['other'] = max(0.0, record['total'] - sum(record['phases'].values()))
+        with self.lock:
+            self.records.append(record)
+
+    def sample(self, kind, values):
+        # other measurements written to the same output, e.g. memory statistics; kept only while timing is enabled
+        if not self.enabled:
+            return
+        with self.lock:
+            self.records.append(dict(values, keyword=kind, start=time.time()))
+
+    def export(self, path=None, format=None):
+        path = path or self.exportPath
+        format = format or self.exportFormat
+        with self.lock:
+            records = list(self.records)
+        if format == 'csv':
+            phases = sorted({p for r in records for p in r.get('phases', {})})
+            extra = sorted({k for r in records for k in r if k not in ('keyword', 'image', 'start', 'total',
+                                                                       'status', 'phases')})
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['keyword', 'image', 'start', 'status', 'total'] + phases + extra)
+                for r in records:
+                    writer.writerow([r['keyword'], r.get('image'), r['start'], r.get('status'), r.get('total')] +
+                                    [r.get('phases', {}).get(p) for p in phases] + [r.get(k) for k in extra])
+        elif format == 'jsonl':
+            with open(path, 'w') as f:
+                for r in records:
+                    f.write(json.dumps(r) + '\n')
+        else:
+            raise Exception('Unsupported timing export format: {}'.format(format))
+        return path
+
+    def summary(self, by='keyword'):
+        # {keyword or image: {'calls': n, 'total': seconds, phase: seconds, ...}}, slowest first
+        result = {}
+        with self.lock:
+            records = [r for r in self.records if 'phases' in r]
+        for r in records:
+            key = r.get(by)
+            if key == None:
+                continue
+            entry = result.setdefault(key, {'calls': 0, 'total': 0.0})
+            entry['calls'] += 1
+            entry['total'] += r['total']
+            for name, seconds in r['phases'].items():
+                entry[name] = entry.get(name, 0.0) + seconds
+        return dict(sorted(result.items(), key=lambda item: -item[1]['total']))
+
+
+def timed(imageArg=None):
+    # decorator of a keyword method, recording its call under the keyword name, including failures and the
+    # logging done after the search; imageArg names the argument recorded as image
+    def decorate(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            image = None
+            if imageArg != None and self.timing.enabled:
+                image = signature.bind(self, *args, **kwargs).arguments.get(imageArg)
+            with self.timing.call(method.__name__, image):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
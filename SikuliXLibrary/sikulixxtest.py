@@ -0,0 +1,101 @@
+# MIT license
+
+# optional input provider, needs python-xlib: pip install robotframework-sikulixlibrary[xtest]
+try:
+    from Xlib import X, XK
+    from Xlib.display import Display
+    from Xlib.ext import xtest
+except ImportError:
+    xtest = None
+
+
+class SikuliXXTestInput():
+    '''
+        Mouse and keyboard input injected directly through the XTest extension of the X server, without the
+        mouse move animation and the per character delays of java.awt.Robot used by SikuliX. Linux (X11) only.
+        Only plain text can be typed: special keys of SikuliX Key and modifiers are left to SikuliX.
+    '''
+    buttons = {'click': 1, 'doubleClick': 1, 'rightClick': 3}
+
+    def __init__(self, displayName=None):
+        if xtest == None:
+            raise Exception('XTest input needs python-xlib, install it with: pip install python-xlib')
+        self.display = Display(displayName)
+        if not self.display.has_extension('XTEST'):
+            raise Exception('X server has no XTEST extension')
+        self.root = self.display.screen().root
+        self.shift = self.display.keysym_to_keycode(XK.XK_Shift_L)
+        # keycode and shift state by character
+        self.keys = {}
+
+    def move(self, x, y):
+        xtest.fake_input(self.display, X.MotionNotify, x=int(x), y=int(y))
+        self.display.sync()
+
+    def move_relative(self, dx, dy):
+        pointer = self.root.query_pointer()
+        self.move(pointer.root_x + int(dx), pointer.root_y + int(dy))
+
+    def action(self, action, x, y):
+        # mouse action of SikuliX Region at the given screen point: click, doubleClick, rightClick or hover
+        self.move(x, y)
+        if action == 'hover':
+            return
+        button = SikuliXXTestInput.buttons[action]
+        for _ in range(2 if action == 'doubleClick' else 1):
+            xtest.fake_input(self.display, X.ButtonPress, button)
+            xtest.fake_input(self.display, X.ButtonRelease, button)
+        self.display.sync()
+
+    def drag_drop(self, x1, y1, x2, y2):
+        # the left button is held while the pointer moves in a few steps, so that applications detect the drag
+        self.move(x1, y1)
+        xtest.fake_input(self.display, X.ButtonPress, 1)
+        self.display.sync()
+        for step in range(1, 5):
+            self.move(x1 + (x2 - x1) * step / 4.0, y1 + (y2 - y1) * step / 4.0)
+        xtest.fake_input(self.display, X.ButtonRelease, 1)
+        self.display.sync()
+
+    def _key(self, char):
+        if char not in self.keys:
+            if char == '\n':
+                keysym = XK.XK_Return
+            elif char == '\t':
+                keysym = XK.XK_Tab
+            elif ord(char) < 0x100:
+                # Latin-1 keysyms are equal to the character code
+                keysym = ord(char)
+            else:
+                keysym = 0x01000000 | ord(char)
+            # index 0 of the keycode mapping is the plain, index 1 the shifted symbol
+            codes = [code for code in self.display.keysym_to_keycodes(keysym) if code[1] in (0, 1)]
+            self.keys[char] = (codes[0][0], codes[0][1] == 1) if codes else None
+        return self.keys[char]
+
+    def can_type(self, text):
+        return all(self._key(char) != None for char in text)
+
+    def type(self, text):
+        for char in text:
+            keycode, shift = self._key(char)
+            if shift:
+                xtest.fake_input(self.display, X.KeyPress, self.shift)
+            xtest.fake_input(self.display, X.KeyPress, keycode)
+            xtest.fake_input(self.display, X.KeyRelease, keycode)
+            if shift:
+                xtest.fake_input(self.display, X.KeyRelease, self.shift)
+        self.display.sync()
+
+    def paste(self):
+        # the text is put into the clipboard by SikuliX, only ctrl+v is injected here
+        ctrl = self.display.keysym_to_keycode(XK.XK_Control_L)
+        v = self.display.keysym_to_keycode(XK.XK_v)
+        xtest.fake_input(self.display, X.KeyPress, ctrl)
+        xtest.fake_input(self.display, X.KeyPress, v)
+        xtest.fake_input(self.display, X.KeyRelease, v)
+        xtest.fake_input(self.display, X.KeyRelease, ctrl)
+        self.display.sync()
+
+    def close(self):
+        self.display.close()
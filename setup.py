@@ -25,6 +25,7 @@ setup_kwargs = {
     "packages": find_packages(exclude=["test"]),
     "include_package_data" : True,
     "install_requires": install_requires,
+    "extras_require": {"xtest": ["python-xlib"], "numpy": ["numpy"], "test": ["pytest"]},
     "python_requires": ">=3.7,<4.0",
     "classifiers": [
         "Development Status :: 5 - Production/Stable",
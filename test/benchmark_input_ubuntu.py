@@ -0,0 +1,39 @@
+# Python script comparing the latency of mouse and keyboard input by SikuliX (java.awt.Robot) and by XTest,
+# on a dedicated Xvfb display. Needs Xvfb and python-xlib: pip install robotframework-sikulixlibrary[xtest]
+
+
+from SikuliXLibrary import SikuliXLibrary, SikuliXJClass
+import time, sys
+
+def measure(name, func, count):
+    times = []
+    for i in range(count):
+        start = time.perf_counter()
+        func(i)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    print('%-24s mean %8.2f ms   p50 %8.2f ms   p95 %8.2f ms' % (name, 1000 * sum(times) / count,
+          1000 * times[count // 2], 1000 * times[int(count * 0.95)]))
+
+if __name__ == "__main__":
+    # sikuli_path: empty for path from SIKULI_HOME + sikulix.jar, not empty might be either SIKULI_HOME + given jar name or full path
+    sikuli_path = 'sikulixide-2.0.5.jar'
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    text = 'The quick brown fox jumps over the lazy dog. '
+
+    lib = SikuliXLibrary(sikuli_path, logImages=False, virtualDisplay='1280x1024x24')
+    lib.log_java_bridge()
+
+    for provider in ('java', 'xtest'):
+        print('=======Input provider: %s' % provider)
+        lib.set_inputProvider(provider)
+        measure('Region MouseMove', lambda i: lib.region_mouseMove(50 if i % 2 else -50, 0), count)
+        if provider == 'java':
+            click = lambda i: lib.appScreen.click(SikuliXJClass.Location(100 + i % 100, 100))
+        else:
+            click = lambda i: lib.xtestInput.action('click', 100 + i % 100, 100)
+        measure('Click', click, count)
+        measure('Region Type (%d chars)' % len(text), lambda i: lib.region_type(text), max(1, count // 10))
+        measure('Region Paste (%d chars)' % len(text), lambda i: lib.region_paste(text), count)
+
+    lib.destroy_vm()
@@ -0,0 +1,94 @@
+from SikuliXLibrary import sikulixasync, sikulixcontext
+from SikuliXLibrary.sikulixasync import SikuliXAsync
+from SikuliXLibrary.sikulixcontext import SikuliXContext
+from SikuliXLibrary.sikulixjclass import SikuliXJClass
+import asyncio, threading, time
+import pytest
+
+
+class Region():
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = (args[0].x, args[0].y, args[0].w, args[0].h)
+        self.x, self.y, self.w, self.h = args
+
+
+class Library():
+    # stands in for SikuliXLibrary: blocking keywords using the region of the current context
+    appRegion = SikuliXContext.field('region')
+
+    def __init__(self):
+        self.mainContext = SikuliXContext(Region(0, 0, 100, 100), False, 'pattern', 'match')
+        self.threads = set()
+        self.finished = threading.Event()
+
+    def _context(self):
+        return SikuliXContext.get(self, self.mainContext)
+
+    def region_setRect(self, x):
+        self.appRegion.x = x
+
+    def region_wait(self, seconds):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(seconds)
+        self.finished.set()
+        return self.appRegion.x
+
+    def region_find(self, target):
+        raise Exception('Image not visible on screen: ' + target)
+
+
+@pytest.fixture
+def alib(monkeypatch):
+    monkeypatch.setattr(SikuliXJClass, 'Region', Region, raising=False)
+    monkeypatch.setattr(sikulixasync, 'attach_background_thread', lambda: None)
+    token = sikulixcontext._sikulixContexts.set(None)
+    result = SikuliXAsync(Library(), maxWorkers=4)
+    yield result
+    result.close()
+    sikulixcontext._sikulixContexts.reset(token)
+
+
+def test_keywords_awaitable(alib):
+    assert asyncio.run(alib.region_wait(0)) == 0
+    assert alib.region_wait.__name__ == 'region_wait'
+    assert all(hasattr(alib, name) for name in SikuliXAsync.keywords)
+
+
+def test_calls_run_in_pool(alib):
+    async def main():
+        start = time.time()
+        await asyncio.gather(*(alib.call('region_wait', 0.2) for _ in range(4)))
+        return time.time() - start
+    # overlapping waits, the event loop is not blocked
+    assert asyncio.run(main()) < 0.6
+    assert all(name.startswith('SikuliXAsync') for name in alib.library.threads)
+
+
+def test_region_state_per_task(alib):
+    async def task(x):
+        await alib.call('region_setRect', x)
+        await asyncio.sleep(0.01)
+        # the next call may run in another pool thread, with the same task context
+        return await alib.region_wait(0.01)
+
+    async def main():
+        return await asyncio.gather(*(task(x) for x in range(1, 5)))
+    assert asyncio.run(main()) == [1, 2, 3, 4]
+    assert alib.library.appRegion.x == 0
+
+
+def test_exception_propagates(alib):
+    with pytest.raises(Exception, match='Image not visible on screen: ok'):
+        asyncio.run(alib.region_find('ok'))
+
+
+def test_cancel_returns_at_once(alib):
+    async def main():
+        start = time.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(alib.region_wait(0.5), timeout=0.05)
+        return time.time() - start
+    assert asyncio.run(main()) < 0.3
+    # the operation already started finishes in background
+    assert alib.library.finished.wait(2)
@@ -0,0 +1,140 @@
+from SikuliXLibrary import sikulixcontext
+from SikuliXLibrary.sikulixcontext import SikuliXContext
+from SikuliXLibrary.sikulixjclass import SikuliXJClass
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, threading
+import pytest
+
+
+class Region():
+    # stands in for the Java Region: a new region from coordinates, or a copy of another region
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = (args[0].x, args[0].y, args[0].w, args[0].h)
+        self.x, self.y, self.w, self.h = args
+
+
+class Library():
+    # minimal owner of contexts, as SikuliXRegion
+    appRegion = SikuliXContext.field('region')
+    userDefined = SikuliXContext.field('userDefined')
+
+    def __init__(self):
+        self.mainContext = SikuliXContext(Region(0, 0, 100, 100), False, 'pattern', 'match')
+
+    def _context(self):
+        return SikuliXContext.get(self, self.mainContext)
+
+
+@pytest.fixture(autouse=True)
+def contexts(monkeypatch):
+    monkeypatch.setattr(SikuliXJClass, 'Region', Region, raising=False)
+    # no context bound by a previous test
+    token = sikulixcontext._sikulixContexts.set(None)
+    yield
+    sikulixcontext._sikulixContexts.reset(token)
+
+
+def in_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_main_thread_uses_main_context():
+    lib = Library()
+    assert lib._context() is lib.mainContext
+    lib.appRegion.x = 10
+    assert lib.mainContext.region.x == 10
+
+
+def test_context_per_thread():
+    lib = Library()
+
+    def work():
+        ctx = lib._context()
+        lib.appRegion.x = 50
+        lib.userDefined = True
+        # same context for the whole thread
+        assert lib._context() is ctx
+        return ctx
+    ctx = in_thread(work)
+    assert ctx is not lib.mainContext and ctx.region is not lib.mainContext.region
+    assert (ctx.region.x, ctx.userDefined) == (50, True)
+    assert (lib.appRegion.x, lib.userDefined) == (0, False)
+    # pattern and match are shared until replaced
+    assert (ctx.pattern, ctx.match) == ('pattern', 'match')
+
+
+def test_threads_do_not_share_contexts():
+    lib = Library()
+    barrier = threading.Barrier(4)
+
+    def work(x):
+        lib.appRegion.x = x
+        barrier.wait()
+        return lib.appRegion.x, lib._context()
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(work, range(4)))
+    assert [x for x, _ in results] == [0, 1, 2, 3]
+    assert len(set(id(ctx) for _, ctx in results)) == 4
+
+
+def test_context_per_task():
+    lib = Library()
+
+    async def task(x):
+        lib.appRegion.x = x
+        await asyncio.sleep(0.01)
+        return lib.appRegion.x, lib._context()
+
+    async def main():
+        return await asyncio.gather(task(1), task(2))
+    (x1, ctx1), (x2, ctx2) = asyncio.run(main())
+    assert (x1, x2) == (1, 2) and ctx1 is not ctx2
+    assert lib.appRegion.x == 0
+
+
+def test_child_task_gets_copy_of_parent_context():
+    lib = Library()
+
+    async def child():
+        inherited = lib.appRegion.x
+        lib.appRegion.x = 2
+        return inherited, lib._context()
+
+    async def parent():
+        lib.appRegion.x = 1
+        inherited, ctx = await asyncio.create_task(child())
+        return inherited, ctx, lib.appRegion.x, lib._context()
+    inherited, childCtx, x, parentCtx = asyncio.run(parent())
+    assert inherited == 1 and x == 1
+    assert childCtx is not parentCtx and childCtx.region.x == 2
+
+
+def test_reset_keeps_main_context():
+    lib = Library()
+    main = lib.mainContext
+    with ThreadPoolExecutor(1) as executor:
+        first = executor.submit(lib._context).result()
+        assert executor.submit(lib._context).result() is first
+        assert SikuliXContext.all(main) == [main, first]
+
+        main.region.x = 30
+        SikuliXContext.reset(main)
+        assert lib._context() is main and SikuliXContext.all(main) == [main]
+        # the stale copy of the worker thread is replaced by a new copy of the main context
+        second = executor.submit(lib._context).result()
+    assert second is not first and second.generation == main.generation and second.region.x == 30
+    assert SikuliXContext.all(main) == [main, second]
+
+
+def test_run_with_context_of_caller():
+    lib = Library()
+    ctx = lib.mainContext.copy()
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(SikuliXContext.run, lib, ctx, lib._context).result() is ctx
+        # bound only for the call
+        assert executor.submit(lib._context).result() is not ctx
@@ -0,0 +1,66 @@
+from SikuliXLibrary.sikulixlogger import SikuliXLogger
+import collections, threading
+
+
+class Frame():
+    # stands in for SikuliXFrame: only size, content hash and perceptual hash are used for the name
+    def __init__(self, pixels, dhash=0, w=100, h=50):
+        self.pixels = pixels
+        self.hash = dhash
+        self.w = w
+        self.h = h
+
+    def digest(self):
+        return '%dx%d:%s' % (self.w, self.h, self.pixels.hex())
+
+    def thumbnail(self, maxSize=160):
+        raise AssertionError('exact deduplication must not hash a downscaled copy')
+
+    def dhash(self):
+        return self.hash
+
+
+def logger():
+    log = SikuliXLogger.__new__(SikuliXLogger)
+    log.storedImages = set()
+    log.recentImages = collections.deque(maxlen=256)
+    log.releasedImages = set()
+    log.storedLock = threading.RLock()
+    return log
+
+
+def options(**kwargs):
+    result = {'format': 'png', 'quality': None, 'maxSize': 0, 'scale': 1.0, 'cropMargin': -1, 'dedup': True,
+              'dedupThreshold': 0, 'thumbnailSize': 0}
+    result.update(kwargs)
+    return result
+
+
+def test_same_content_same_name():
+    log = logger()
+    path = log._dedup_path(Frame(b'\x01\x02'), 'out/matches/', options())
+    assert path.startswith('out/matches/') and path.endswith('.png')
+    assert log._dedup_path(Frame(b'\x01\x02'), 'out/matches/', options()) == path
+
+
+def test_content_size_and_encoding_change_name():
+    log = logger()
+    path = log._dedup_path(Frame(b'\x01\x02'), 'out/', options())
+    assert log._dedup_path(Frame(b'\x01\x03'), 'out/', options()) != path
+    assert log._dedup_path(Frame(b'\x01\x02', w=101), 'out/', options()) != path
+    assert log._dedup_path(Frame(b'\x01\x02'), 'out/', options(maxSize=640)) != path
+    assert log._dedup_path(Frame(b'\x01\x02'), 'out/', options(format='jpeg')).endswith('.jpg')
+
+
+def test_similar_recent_image_reused():
+    log = logger()
+    first = log._dedup_path(Frame(b'\x01', dhash=0b1111), 'out/', options(dedupThreshold=2))
+    assert log._dedup_path(Frame(b'\x02', dhash=0b1100), 'out/', options(dedupThreshold=2)) == first
+    assert log._dedup_path(Frame(b'\x03', dhash=0b0000), 'out/', options(dedupThreshold=2)) != first
+
+
+def test_released_image_not_reused():
+    log = logger()
+    first = log._dedup_path(Frame(b'\x01', dhash=0b1111), 'out/', options(dedupThreshold=2))
+    log.releasedImages.add(first)
+    assert log._dedup_path(Frame(b'\x02', dhash=0b1110), 'out/', options(dedupThreshold=2)) != first
@@ -0,0 +1,159 @@
+from SikuliXLibrary import sikulixcapture
+from SikuliXLibrary.sikulixcapture import SikuliXFrame, SikuliXFrameBuffer
+from SikuliXLibrary.sikulixjclass import SikuliXJClass
+from SikuliXLibrary.sikulixlogger import SikuliXLogger
+from SikuliXLibrary.sikulixtiming import SikuliXTiming
+import collections, itertools, threading, time
+import pytest
+
+
+def buffer(size):
+    # frames are appended as done by the sampler thread, without capturing the screen
+    result = SikuliXFrameBuffer()
+    result.frames = collections.deque(maxlen=size)
+    return result
+
+
+def test_history_keeps_last_frames():
+    b = buffer(3)
+    for i in range(5):
+        b.frames.append(i)
+    assert b.history() == [2, 3, 4]
+
+
+def test_history_is_a_snapshot():
+    b = buffer(3)
+    b.frames.append(1)
+    history = b.history()
+    b.frames.append(2)
+    assert history == [1]
+
+
+class Point():
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Screen():
+    def getBottomRight(self):
+        return Point(1920, 1080)
+
+
+class Frame():
+    # stands in for a captured frame, numbered in capture order
+    def __init__(self, number):
+        self.number = number
+        self.timestamp = time.time()
+        self.factor = None
+
+    def scaled(self, factor):
+        self.factor = factor
+        return self
+
+
+@pytest.fixture
+def captures(monkeypatch):
+    # the sampler thread captures from a stub screen, no JVM is needed
+    counter = itertools.count()
+    captured = []
+
+    def capture(screen, region):
+        captured.append(region)
+        return Frame(next(counter))
+    monkeypatch.setattr(sikulixcapture, 'attach_background_thread', lambda: None)
+    monkeypatch.setattr(SikuliXJClass, 'Screen', Screen, raising=False)
+    monkeypatch.setattr(SikuliXFrame, 'capture', staticmethod(capture))
+    return captured
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end, 'timeout'
+        time.sleep(0.01)
+
+
+def test_run_samples_whole_screen(captures):
+    b = SikuliXFrameBuffer()
+    b.start(seconds=1, rate=50, maxSize=480)
+    try:
+        wait_for(lambda: len(captures) > 55)
+    finally:
+        b.stop()
+    assert not b.running()
+    assert captures[0] == (0, 0, 1920, 1080)
+    history = b.history()
+    # ring buffer of one second at the given rate, oldest first, downscaled to maxSize
+    assert [f.number for f in history] == list(range(history[0].number, history[0].number + 50))
+    assert history[0].number > 0 and history[0].factor == 0.25
+
+
+def test_stop_ends_sampling(captures):
+    b = SikuliXFrameBuffer()
+    b.start(seconds=1, rate=100)
+    wait_for(lambda: len(captures) > 3)
+    b.stop()
+    count = len(captures)
+    time.sleep(0.1)
+    assert not b.running() and len(captures) == count
+    # restart with a new buffer size, frames of the previous run are dropped
+    b.start(seconds=0.1, rate=100)
+    try:
+        wait_for(lambda: len(b.history()) == 10)
+    finally:
+        b.stop()
+    assert b.history()[0].number >= count
+
+
+def test_clear_while_sampling(captures):
+    b = SikuliXFrameBuffer()
+    b.start(seconds=1, rate=200)
+    try:
+        wait_for(lambda: len(b.history()) > 0)
+        b.clear()
+        count = len(captures)
+        # no frame captured before clearing is kept, the sampler goes on
+        wait_for(lambda: len(captures) > count + 2)
+        assert all(f.number >= count - 1 for f in b.history())
+        assert b.running()
+    finally:
+        b.stop()
+
+
+def logger(monkeypatch, stored):
+    # failure logging with the screenshot and the file writing stubbed, only the strip of frames is recorded
+    log = SikuliXLogger.__new__(SikuliXLogger)
+    log.timing = SikuliXTiming()
+    log.failedLogImages = True
+    log.searchedFrame = None
+    log.logImageOptions = {'thumbnailSize': 0}
+    log.frameBuffer = SikuliXFrameBuffer()
+    monkeypatch.setattr(log, '_failure_screenshot', lambda frame: 'screenshot.png', raising=False)
+    monkeypatch.setattr(log, '_store_frame', lambda frame, folder: stored.append((frame, folder)) or 'strip.png',
+                        raising=False)
+    monkeypatch.setattr(SikuliXFrame, 'strip', staticmethod(lambda frames: list(frames)))
+    return log
+
+
+def test_failure_logs_frame_strip(captures, monkeypatch):
+    stored = []
+    log = logger(monkeypatch, stored)
+    log.frameBuffer.start(seconds=0.1, rate=100)
+    try:
+        wait_for(lambda: len(log.frameBuffer.history()) == 10)
+        with pytest.raises(Exception, match='Screen did not change'):
+            log._failed('Screen did not change', 1, mode='change')
+    finally:
+        log.frameBuffer.stop()
+    (strip, folder), = stored
+    assert folder == '/screenshots/' and len(strip) == 10
+    assert [f.number for f in strip] == sorted(f.number for f in strip)
+
+
+def test_no_strip_without_frames(monkeypatch):
+    stored = []
+    log = logger(monkeypatch, stored)
+    with pytest.raises(Exception, match='Screen did not change'):
+        log._failed('Screen did not change', 1, mode='change')
+    assert stored == []
@@ -0,0 +1,100 @@
+from SikuliXLibrary import sikulixhighlight
+from SikuliXLibrary.sikulixhighlight import SikuliXHighlighter
+import threading, time
+import pytest
+
+
+class Target():
+    # stands in for a SikuliX Region or Match, records the overlay switching
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def highlight(self, seconds):
+        self.calls.append(('highlight', seconds))
+
+    def highlightOn(self):
+        with self.lock:
+            self.calls.append('on')
+
+    def highlightOff(self):
+        with self.lock:
+            self.calls.append('off')
+
+
+@pytest.fixture
+def highlighter(monkeypatch):
+    monkeypatch.setattr(sikulixhighlight, 'attach_background_thread', lambda: None)
+    result = SikuliXHighlighter()
+    result.mode = 'async'
+    yield result
+    result.cancel()
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end, 'timeout'
+        time.sleep(0.01)
+
+
+def test_blocking_mode():
+    target = Target()
+    assert SikuliXHighlighter().show(target, 2) == 2.0
+    assert target.calls == [('highlight', 2.0)]
+
+
+def test_async_returns_at_once(highlighter):
+    target = Target()
+    start = time.time()
+    assert highlighter.show(target, 0.2) == 0.2
+    assert time.time() - start < 0.1 and target.calls == ['on']
+    wait_for(lambda: target.calls == ['on', 'off'])
+    assert highlighter.active == {} and highlighter.timers == set()
+
+
+def test_off_by_last_highlight_of_target(highlighter):
+    target = Target()
+    highlighter.show(target, 0.1)
+    highlighter.show(target, 0.4)
+    assert target.calls == ['on'] and highlighter.active[target] == 2
+    time.sleep(0.2)
+    # the first timer ended, the target is still highlighted by the second one
+    assert target.calls == ['on'] and highlighter.active[target] == 1
+    wait_for(lambda: target.calls == ['on', 'off'])
+    assert highlighter.active == {}
+
+
+def test_concurrent_highlights_switch_once(highlighter):
+    target = Target()
+    threads = [threading.Thread(target=highlighter.show, args=(target, 0.05)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wait_for(lambda: highlighter.active == {} and 'off' in target.calls)
+    assert target.calls == ['on', 'off']
+
+
+def test_cancel_switches_off_pending(highlighter):
+    first, second = Target(), Target()
+    highlighter.show(first, 10)
+    highlighter.show(first, 10)
+    highlighter.show(second, 10)
+    highlighter.cancel()
+    assert first.calls == ['on', 'off'] and second.calls == ['on', 'off']
+    assert highlighter.active == {} and highlighter.timers == set()
+    # the cancelled timers do not switch off a later highlight
+    highlighter.show(first, 0.3)
+    time.sleep(0.1)
+    assert first.calls == ['on', 'off', 'on']
+
+
+def test_budget(highlighter):
+    target = Target()
+    highlighter.budget = 0.5
+    assert highlighter.show(target, 0.3) == 0.3
+    assert highlighter.show(target, 0.3) == pytest.approx(0.2)
+    assert highlighter.show(target, 0.3) == 0
+    highlighter.reset()
+    assert highlighter.show(target, 0.3) == 0.3
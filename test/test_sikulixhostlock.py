@@ -0,0 +1,65 @@
+from SikuliXLibrary.sikulixhostlock import SikuliXHostLock
+import os, threading
+import pytest
+
+
+def test_default_path_by_display(monkeypatch):
+    monkeypatch.setenv('DISPLAY', ':99.0')
+    assert os.path.basename(SikuliXHostLock.default_path()) == 'sikulix-input-_99.0.lock'
+    monkeypatch.delenv('DISPLAY')
+    assert os.path.basename(SikuliXHostLock.default_path()) == 'sikulix-input-default.lock'
+
+
+def test_exclusive_between_lock_files(tmp_path):
+    # two locks on the same file stand for two processes
+    path = str(tmp_path / 'input.lock')
+    first, second = SikuliXHostLock(path), SikuliXHostLock(path, timeout=0.1)
+    try:
+        with first:
+            with pytest.raises(Exception):
+                second.acquire()
+        with second:
+            pass
+    finally:
+        first.close()
+        second.close()
+
+
+def test_reentrant(tmp_path):
+    path = str(tmp_path / 'input.lock')
+    first, second = SikuliXHostLock(path), SikuliXHostLock(path, timeout=0.1)
+    try:
+        first.acquire()
+        first.acquire()
+        first.release()
+        # still held once
+        with pytest.raises(Exception):
+            second.acquire()
+        first.release()
+        with second:
+            pass
+    finally:
+        first.close()
+        second.close()
+
+
+def test_threads_wait_for_each_other(tmp_path):
+    lock = SikuliXHostLock(str(tmp_path / 'input.lock'))
+    inside, overlaps = [], []
+
+    def work():
+        for _ in range(50):
+            with lock:
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(len(inside))
+                inside.pop()
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        lock.close()
+    assert overlaps == [] and lock.count == 0
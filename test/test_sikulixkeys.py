@@ -0,0 +1,54 @@
+from SikuliXLibrary.sikulixkeys import SikuliXKeySequence
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def keys(monkeypatch):
+    # Key constants as resolved from SikuliX, so that no JVM is needed
+    monkeypatch.setattr(SikuliXKeySequence, 'keys', {'ENTER': '\n', 'TAB': '\t', 'F5': '\ue015', 'END': '\ue007',
+                                                     'CTRL': '\ue021', 'SHIFT': '\ue020', 'ALT': '\ue022'})
+    SikuliXKeySequence.compile.cache_clear()
+    yield
+    SikuliXKeySequence.compile.cache_clear()
+
+
+def test_text_and_keys_merged():
+    assert SikuliXKeySequence.compile('user{TAB}secret{ENTER}').steps == [('type', 'user\tsecret\n', None)]
+
+
+def test_repeated_key():
+    assert SikuliXKeySequence.compile('{TAB 3}x').steps == [('type', '\t\t\tx', None)]
+
+
+def test_chord():
+    assert SikuliXKeySequence.compile('{CTRL+A}{CTRL+SHIFT+END}').steps == [('type', 'a', '\ue021'),
+                                                                             ('type', '\ue007', '\ue021\ue020')]
+
+
+def test_chord_with_plus_key():
+    assert SikuliXKeySequence.compile('{CTRL++}').steps == [('type', '+', '\ue021')]
+
+
+def test_wait_splits_text():
+    assert SikuliXKeySequence.compile('a{WAIT 0.5}b').steps == [('type', 'a', None), ('wait', 0.5), ('type', 'b', None)]
+
+
+def test_literal_braces():
+    assert SikuliXKeySequence.compile('{{x}}').steps == [('type', '{x}', None)]
+
+
+def test_errors():
+    with pytest.raises(Exception):
+        SikuliXKeySequence.compile('{TAB')
+    with pytest.raises(Exception):
+        SikuliXKeySequence.compile('{HYPER+A}')
+
+
+def test_run_one_call_per_step():
+    class Target():
+        calls = []
+        def type(self, *args):
+            self.calls.append(args)
+    target = Target()
+    SikuliXKeySequence.compile('ab{CTRL+C}{WAIT 0}{ENTER}').run(target)
+    assert target.calls == [('ab',), ('c', '\ue021'), ('\n',)]
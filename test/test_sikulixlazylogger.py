@@ -0,0 +1,89 @@
+from SikuliXLibrary import sikulixjclass, sikulixlogger
+from SikuliXLibrary.sikulixjclass import SikuliXLazyLogger
+from SikuliXLibrary.sikulixlogger import SikuliXLogger
+import pytest
+
+
+class BuiltIn():
+    # stands in for robot BuiltIn, ${LOG LEVEL} as set by --loglevel or Set Log Level
+    def __init__(self, level):
+        self.level = level
+        self.reads = 0
+
+    def get_variable_value(self, name, default=None):
+        self.reads += 1
+        return self.level
+
+
+class JavaObject():
+    # counts the conversions to string, as done for Java objects over the bridge
+    conversions = 0
+
+    def __str__(self):
+        JavaObject.conversions += 1
+        return 'Region'
+
+
+@pytest.fixture
+def written(monkeypatch):
+    messages = []
+    monkeypatch.setattr(sikulixjclass.logger, 'write', lambda msg, level, html=False: messages.append((level, msg)))
+    JavaObject.conversions = 0
+    return messages
+
+
+def lazy(level):
+    log = SikuliXLazyLogger()
+    log.builtIn = BuiltIn(level)
+    return log
+
+
+def test_disabled_level_not_formatted(written):
+    log = lazy('INFO')
+    called = []
+    log.trace('Region: %s', JavaObject())
+    log.debug(lambda: called.append(1) or 'message')
+    assert written == [] and called == [] and JavaObject.conversions == 0
+
+
+def test_enabled_level_formatted(written):
+    log = lazy('DEBUG')
+    log.debug('Region: %s', JavaObject())
+    log.info(lambda: 'Active area %s' % JavaObject())
+    log.trace('Region: %s', JavaObject())
+    assert written == [('DEBUG', 'Region: Region'), ('INFO', 'Active area Region')]
+    assert JavaObject.conversions == 2
+
+
+def test_level_cached_until_refresh(written):
+    log = lazy('INFO')
+    log.info('first')
+    log.info('second')
+    assert log.builtIn.reads == 1
+    log.builtIn.level = 'TRACE'
+    log.trace('hidden')
+    log.refresh()
+    log.trace('shown')
+    assert written == [('INFO', 'first'), ('INFO', 'second'), ('TRACE', 'shown')]
+
+
+def test_outside_robot_info(written):
+    class Failing():
+        def get_variable_value(self, name, default=None):
+            raise Exception('Cannot access execution context')
+    log = SikuliXLazyLogger()
+    log.builtIn = Failing()
+    assert log.enabled('INFO') and not log.enabled('DEBUG')
+
+
+def test_listener_refreshes_after_set_log_level(monkeypatch):
+    log = lazy('INFO')
+    monkeypatch.setattr(sikulixlogger, 'lazyLogger', log)
+    library = SikuliXLogger.__new__(SikuliXLogger)
+    assert not log.enabled('DEBUG')
+
+    log.builtIn.level = 'DEBUG'
+    library.end_keyword('Log', {'kwname': 'Log', 'libname': 'BuiltIn'})
+    assert not log.enabled('DEBUG')
+    library.end_keyword('Set Log Level', {'kwname': 'Set Log Level', 'libname': 'BuiltIn'})
+    assert log.enabled('DEBUG')
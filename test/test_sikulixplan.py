@@ -0,0 +1,41 @@
+from SikuliXLibrary.sikulixplan import SikuliXActionStep
+import pytest
+
+
+def test_parse_string():
+    step = SikuliXActionStep.parse('click | ok.png | 5 | -3')
+    assert (step.action, step.target, step.dx, step.dy, step.text) == ('click', 'ok.png', 5, -3, None)
+    assert step.targets() == [('ok.png', 5, -3)]
+
+
+def test_parse_string_keeps_text_spaces():
+    step = SikuliXActionStep.parse('type|name.png|||  Smith ')
+    assert (step.target, step.dx, step.dy, step.text) == ('name.png', 0, 0, '  Smith ')
+
+
+def test_parse_type_without_target():
+    step = SikuliXActionStep.parse('typeKeys||||{TAB}Smith{ENTER}')
+    assert step.target == None and step.targets() == []
+
+
+def test_parse_list_and_dict():
+    step = SikuliXActionStep.parse(['dragDrop', 'file.png', 1, 2, None, 'folder.png', 3, 4])
+    assert step.targets() == [('file.png', 1, 2), ('folder.png', 3, 4)]
+    step = SikuliXActionStep.parse({'action': 'paste', 'text': 'a|b', 'target': 'field.png'})
+    assert (step.text, step.target) == ('a|b', 'field.png')
+
+
+def test_parse_wait():
+    step = SikuliXActionStep.parse('wait|0.5')
+    assert step.target == '0.5' and step.targets() == []
+
+
+def test_parse_step_unchanged():
+    step = SikuliXActionStep('hover', 'menu.png')
+    assert SikuliXActionStep.parse(step) is step
+
+
+@pytest.mark.parametrize('step', ['scroll|x.png', 'click', 'type|field.png', 'dragDrop|file.png'])
+def test_invalid_steps(step):
+    with pytest.raises(Exception):
+        SikuliXActionStep.parse(step)
@@ -0,0 +1,92 @@
+from SikuliXLibrary.sikulixretention import SikuliXRetentionPolicy
+
+
+def policy(**settings):
+    result = SikuliXRetentionPolicy()
+    result.settings.update(settings)
+    result.start_test('Suite.Test')
+    return result
+
+
+def test_no_limit_keeps_all():
+    for strategy in ('keep-first', 'keep-last'):
+        p = policy(strategy=strategy, sampleEvery=3)
+        assert [p.admit('img%d' % i) for i in range(5)] == [(True, [])] * 5
+
+
+def test_sample_without_limit():
+    p = policy(strategy='sample', sampleEvery=3)
+    assert [p.admit('img%d' % i)[0] for i in range(7)] == [True, False, False, True, False, False, True]
+    assert p.end_test('Suite.Test', 'PASS') == (4, 0)
+
+
+def test_keep_first_drops_above_limit():
+    p = policy(maxTestImages=2)
+    assert [p.admit('img%d' % i)[0] for i in range(4)] == [True, True, False, False]
+    assert p.end_test('Suite.Test', 'PASS') == (2, 0)
+
+
+def test_keep_last_evicts_oldest():
+    p = policy(maxTestImages=2, strategy='keep-last')
+    assert p.admit('img0') == (True, [])
+    assert p.admit('img1') == (True, [])
+    assert p.admit('img2') == (True, ['img0'])
+    assert p.admit('img3') == (True, ['img1'])
+    assert p.end_test('Suite.Test', 'FAIL') == (0, 2)
+
+
+def test_sample_with_limit():
+    p = policy(maxTestImages=10, strategy='sample', sampleEvery=3)
+    assert [p.admit('img%d' % i)[0] for i in range(7)] == [True, False, False, True, False, False, True]
+
+
+def test_byte_budget_counts_written_sizes():
+    p = policy(maxTestBytes=100)
+    assert p.admit('img0')[0]
+    p.account('img0', 60)
+    assert p.admit('img1')[0]
+    p.account('img1', 60)
+    assert not p.admit('img2')[0]
+
+
+def test_test_scope_restarts():
+    p = policy(maxTestImages=1)
+    assert p.admit('img0')[0]
+    p.end_test('Suite.Test', 'PASS')
+    p.start_test('Suite.Other')
+    assert p.admit('img1')[0]
+
+
+def test_suite_limit_over_tests():
+    p = policy(maxSuiteImages=2)
+    assert p.admit('img0')[0]
+    p.end_test('Suite.Test', 'PASS')
+    p.start_test('Suite.Other')
+    assert p.admit('img1')[0]
+    assert not p.admit('img2')[0]
+    p.start_suite()
+    assert p.admit('img3')[0]
+
+
+def test_prunable_only_passed_tests():
+    p = policy(prunePassed=True)
+    p.reference('shared')
+    p.reference('passed')
+    p.end_test('Suite.Test', 'PASS')
+    p.start_test('Suite.Failed')
+    p.reference('shared')
+    p.end_test('Suite.Failed', 'FAIL')
+    assert p.prunable() == ['passed']
+
+
+def test_report_without_suite_level_images():
+    p = policy(maxTestImages=1)
+    p.end_test('Suite.Test', 'PASS')
+    # images logged outside of a test, e.g. in suite setup
+    p.admit('img0')
+    p.admit('img1')
+    p.start_test('Suite.Test')
+    p.admit('img2')
+    p.admit('img3')
+    report = p.report()
+    assert report['dropped'] == 2 and report['tests'] == ['Suite.Test']
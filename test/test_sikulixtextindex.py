@@ -0,0 +1,43 @@
+from SikuliXLibrary.sikulixtextindex import SikuliXTextIndex
+import pytest
+
+# two lines: "File Save as" and "Total: 42 items"
+words = [('File', 10, 10, 30, 12), ('Save', 50, 10, 40, 12), ('as', 95, 10, 20, 12),
+         ('Total:', 10, 30, 50, 12), ('42', 65, 30, 20, 12), ('items', 90, 30, 45, 12)]
+lines = [('File Save as', 10, 10, 105, 12), ('Total: 42 items', 10, 30, 125, 12)]
+
+
+def index():
+    return SikuliXTextIndex(words, lines, (0, 0, 200, 50), 'signature')
+
+
+def test_exact_word():
+    assert index().lookup('Save') == ('Save', 50, 10, 40, 12)
+
+
+def test_exact_phrase_union_of_words():
+    assert index().lookup('Save as') == ('Save as', 50, 10, 65, 12)
+
+
+def test_exact_phrase_not_across_lines():
+    assert index().lookup('as Total:') == None
+    assert index().lookup('as Total:', mode='fuzzy', similar=0.9) == None
+
+
+def test_exact_not_found():
+    assert index().lookup('Open') == None
+
+
+def test_regex_word_before_line():
+    assert index().lookup(r'\d+', mode='regex') == ('42', 65, 30, 20, 12)
+    assert index().lookup(r'Total: \d+', mode='regex') == ('Total: 42 items', 10, 30, 125, 12)
+
+
+def test_fuzzy_best_match():
+    assert index().lookup('Sve as', mode='fuzzy', similar=0.7) == ('Save as', 50, 10, 65, 12)
+    assert index().lookup('Sve as', mode='fuzzy', similar=0.95) == None
+
+
+def test_unsupported_mode():
+    with pytest.raises(Exception):
+        index().lookup('Save', mode='glob')
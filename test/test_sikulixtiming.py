@@ -0,0 +1,87 @@
+from SikuliXLibrary.sikulixtiming import SikuliXTiming, timed
+import csv, json, time
+import pytest
+
+
+class Library():
+    # minimal keyword owner, as the library passes its timing to the decorated keywords
+    def __init__(self):
+        self.timing = SikuliXTiming()
+        self.timing.enabled = True
+
+    @timed('target')
+    def region_click(self, target=None, dx=0):
+        with self.timing.phase('match'):
+            time.sleep(0.05)
+            with self.timing.phase('bridge'):
+                time.sleep(0.1)
+        with self.timing.phase('action'):
+            time.sleep(0.01)
+        return dx
+
+    @timed('img')
+    def region_text(self, img):
+        # nested library keyword, recorded only as part of the outer call
+        self.region_click(img)
+        raise Exception('Text not found')
+
+
+def test_phases_exclusive():
+    lib = Library()
+    assert lib.region_click('button.png', dx=5) == 5
+    record, = lib.timing.records
+    assert record['keyword'] == 'region_click' and record['image'] == 'button.png' and record['status'] == 'PASS'
+    phases = record['phases']
+    # the nested bridge phase is not counted for match, which would be at least 0.15 seconds otherwise
+    assert 0.05 <= phases['match'] < 0.1
+    assert phases['bridge'] >= 0.1
+    assert sum(phases.values()) == pytest.approx(record['total'], abs=0.001)
+
+
+def test_nested_call_and_failure():
+    lib = Library()
+    with pytest.raises(Exception):
+        lib.region_text('label.png')
+    record, = lib.timing.records
+    assert record['keyword'] == 'region_text' and record['image'] == 'label.png' and record['status'] == 'FAIL'
+    assert 'match' in record['phases']
+
+
+def test_disabled_records_nothing():
+    lib = Library()
+    lib.timing.enabled = False
+    lib.region_click('button.png')
+    lib.timing.sample('memory', {'heapUsed': 10.0})
+    assert lib.timing.records == []
+
+
+def test_export_jsonl(tmp_path):
+    lib = Library()
+    lib.region_click('button.png')
+    lib.timing.sample('memory', {'heapUsed': 10.0})
+    path = lib.timing.export(str(tmp_path / 'timing.jsonl'), 'jsonl')
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r['keyword'] for r in records] == ['region_click', 'memory']
+    assert records[1]['heapUsed'] == 10.0
+
+
+def test_export_csv(tmp_path):
+    lib = Library()
+    lib.region_click('button.png')
+    lib.timing.sample('memory', {'heapUsed': 10.0})
+    path = lib.timing.export(str(tmp_path / 'timing.csv'), 'csv')
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]['keyword'] == 'region_click' and rows[0]['image'] == 'button.png'
+    assert float(rows[0]['match']) > 0 and rows[0]['heapUsed'] == ''
+    assert rows[1]['keyword'] == 'memory' and float(rows[1]['heapUsed']) == 10.0
+
+
+def test_summary_by_keyword():
+    lib = Library()
+    lib.region_click('a.png')
+    lib.region_click('b.png')
+    summary = lib.timing.summary()
+    assert summary['region_click']['calls'] == 2
+    assert set(lib.timing.summary('image')) == {'a.png', 'b.png'}
@@ -0,0 +1,43 @@
+from SikuliXLibrary.sikulixjclass import SikuliXJClass
+import os, shutil, sys
+import pytest
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux') or shutil.which('Xvfb') == None,
+                                reason='needs Xvfb on Linux')
+
+
+@pytest.fixture
+def jclass(monkeypatch):
+    # the display is started before the JVM, no JVM is needed for this
+    monkeypatch.delenv('DISPLAY', raising=False)
+    instance = SikuliXJClass.__new__(SikuliXJClass)
+    yield instance
+    instance._stop_virtual_display()
+
+
+def test_start_and_stop(jclass):
+    jclass._start_virtual_display('640x480')
+    process = SikuliXJClass.XvfbProcess
+    assert process.poll() == None
+    assert os.environ['DISPLAY'].startswith(':')
+    jclass._stop_virtual_display()
+    assert process.poll() != None and SikuliXJClass.XvfbProcess == None
+
+
+def test_free_display_per_process(jclass):
+    # a second server, as started by another worker, picks another display number
+    jclass._start_virtual_display(True)
+    first, firstProcess = os.environ['DISPLAY'], SikuliXJClass.XvfbProcess
+    SikuliXJClass.XvfbProcess = None
+    try:
+        jclass._start_virtual_display('800x600x16')
+        assert os.environ['DISPLAY'] != first
+    finally:
+        firstProcess.terminate()
+        firstProcess.wait()
+
+
+def test_bad_screen(jclass):
+    with pytest.raises(Exception):
+        jclass._start_virtual_display('wide')
+    assert SikuliXJClass.XvfbProcess == None